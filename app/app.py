@@ -1,28 +1,39 @@
-import json
-import pprint
-from flask import Flask, request, jsonify
-import yfinance as yf
-import alpaca_trade_api as tradeapi
-import finnhub
-import requests
+import time
+
+# Startup report starts counting here; heavy libraries are imported on first use
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Blueprint, Flask, g, has_request_context, request, jsonify
 import os
-import pandas as pd
 from datetime import datetime, timedelta
+import hashlib
 import logging
-from dateutil import parser
+import math
+import threading
+import traceback
 from dotenv import load_dotenv
 from flask_cors import CORS
-from flask.json import JSONEncoder
-import numpy as np
-import pickle
-from google import genai
-from model.model import get_top_choices
-
-from flask.json import JSONEncoder
-import numpy as np
-
-app = Flask(__name__)
-CORS(app)
+from news_cache import NewsCache
+from search_index import SearchIndex
+from symbol_index import SymbolIndex
+from congress_rollups import CongressRollups
+from bar_store import BarStore
+from disclosure_returns import DisclosureReturns
+from backtest import Backtester, STRATEGIES
+from indicators import IndicatorTracker, series as indicator_series
+from screener import Screener, FILTERS as SCREENER_FILTERS, default_universe
+from shared_cache import SharedCache
+from timing import StageTimer, LatencyTracker
+from rate_limit import SharedRateLimiter, rate_limited
+from concurrent.futures import ThreadPoolExecutor
+from metrics import metrics, instrument
+from circuit_breaker import CircuitOpenError, UpstreamTimeout, breakers, get_breaker, guard
+from http_cache import conditional
+from json_provider import FastJSONProvider
+from lazy import LazyObject
+from prefetch import PrefetchScheduler
+
+bp = Blueprint('api', __name__)
 
 # Load environment variables
 load_dotenv()
@@ -39,14 +50,141 @@ ALPACA_BASE_URL = os.getenv('ALPACA_BASE_URL', 'https://paper-api.alpaca.markets
 FINNHUB_API_KEY = os.getenv('FINNHUB_API_KEY')
 
 
-# Setup client
-finnhub_client = finnhub.Client(api_key=FINNHUB_API_KEY)
+# Clients are built on first use so importing the app stays cheap
+def make_finnhub_client():
+    import finnhub
+    return guard(instrument(finnhub.Client(api_key=FINNHUB_API_KEY), 'finnhub'), 'finnhub')
+
+def make_alpaca_client():
+    import alpaca_trade_api as tradeapi
+    client = instrument(tradeapi.REST(ALPACA_API_KEY, ALPACA_API_SECRET, ALPACA_BASE_URL, api_version='v2'), 'alpaca')
+    return rate_limited(client, alpaca_limiter)
+
+finnhub_client = LazyObject(make_finnhub_client, 'finnhub')
+
+# Local full-text index over everything we have fetched or ingested
+search_index = LazyObject(lambda: SearchIndex(os.getenv('SEARCH_INDEX_PATH', 'search_index.db')), 'search_index')
+
+def index_news(symbol, items):
+    try:
+        search_index.add_news(symbol, items)
+    except Exception as e:
+        logger.error(f"Error indexing news for {symbol}: {str(e)}")
+
+# Refreshes of stale cached data, so requests return what is cached instead of waiting on them
+refresh_pool = ThreadPoolExecutor(max_workers=int(os.getenv('REFRESH_CONCURRENCY', '4')), thread_name_prefix='refresh')
+
+def refresh_in_background(fn, *args):
+    def run():
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"Error refreshing cached data in the background: {str(e)}")
+    refresh_pool.submit(run)
+
+news_cache = NewsCache(finnhub_client, on_fetch=index_news, background=refresh_in_background)
 
 # Initialize Alpaca API
-api = tradeapi.REST(ALPACA_API_KEY, ALPACA_API_SECRET, ALPACA_BASE_URL, api_version='v2')
+api = LazyObject(make_alpaca_client, 'alpaca')
+
+# Quotes, company info and bars, shared by every worker process on the host
+shared_cache = LazyObject(lambda: SharedCache(os.getenv('SHARED_CACHE_PATH', 'shared_cache.db')), 'shared_cache')
+QUOTE_TTL = 5
+BARS_TTL = 60
+INFO_TTL = 900
+CLOCK_TTL = 30
+# How long past its ttl cached market data is still served while a refresh is attempted
+STALE_TTL = int(os.getenv('STALE_TTL', '3600'))
+# Longest a request waits on yfinance or Alpaca for data that is not cached at all
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '5'))
+
+order_latency = LatencyTracker()
+# Whole baskets, kept apart so a 100-leg batch doesn't read as one slow order
+batch_latency = LatencyTracker()
+
+# Every Alpaca call, from every worker on the host, draws on one budget under the account's
+# 200 requests/minute limit: ALPACA_RATE_LIMIT a minute plus at most ALPACA_RATE_BURST at once
+ALPACA_MAX_CONCURRENCY = int(os.getenv('ALPACA_MAX_CONCURRENCY', '8'))
+alpaca_limiter = LazyObject(lambda: SharedRateLimiter(
+    os.getenv('SHARED_CACHE_PATH', 'shared_cache.db'), 'alpaca',
+    int(os.getenv('ALPACA_RATE_LIMIT', '190')), per=60, burst=int(os.getenv('ALPACA_RATE_BURST', '10'))
+), 'alpaca_limiter')
+order_pool = ThreadPoolExecutor(max_workers=ALPACA_MAX_CONCURRENCY)
+MAX_BATCH_ORDERS = 100
+
+metrics.register_gauge('cache_entries', 'Entries held in caches', lambda: {
+    'shared': shared_cache.stats()['entries'] if shared_cache.initialized else 0
+})
+metrics.register_gauge('circuit_open', 'Whether calls to an upstream are failing fast', lambda: {
+    name: int(breaker.state != 'closed') for name, breaker in breakers.items()
+})
+
+def yf_ticker(symbol):
+    import yfinance as yf
+    return instrument(yf.Ticker(symbol), 'yfinance')
+
+def cached_upstream(key, fn, ttl, upstream='yfinance'):
+    """Cached upstream data, refreshed in the background once older than ttl and served stale meanwhile.
+
+    Only a cold miss waits on the upstream, through its circuit breaker and for at most
+    UPSTREAM_TIMEOUT; a call that times out still fills the cache when it finishes.
+    """
+    breaker = get_breaker(upstream)
+
+    def fetch():
+        try:
+            return breaker.call(fn, timeout=UPSTREAM_TIMEOUT)
+        except UpstreamTimeout as e:
+            def store_late_result(future):
+                if future.exception() is None:
+                    shared_cache.set_fresh(key, future.result(), ttl, STALE_TTL)
+            e.future.add_done_callback(store_late_result)
+            raise
+
+    value, stale = shared_cache.get_or_refresh(key, fetch, ttl, STALE_TTL, refresh_in_background)
+    if stale and has_request_context():
+        g.served_stale = True
+    return value
+
+def upstream_error(e):
+    """503 with Retry-After while an upstream's circuit is open, 504 when it timed out, else 500"""
+    if isinstance(e, CircuitOpenError):
+        return jsonify({'error': str(e), 'upstream': e.upstream}), 503, {'Retry-After': str(math.ceil(e.retry_after))}
+    if isinstance(e, UpstreamTimeout):
+        return jsonify({'error': str(e), 'upstream': e.upstream}), 504
+    return jsonify({'error': str(e)}), 500
+
+@bp.after_request
+def flag_stale_response(response):
+    if g.get('served_stale'):
+        response.headers['X-Data-Stale'] = '1'
+    return response
+
+def get_ticker_info(symbol):
+    """Company info from yfinance, fetched once per host every INFO_TTL seconds"""
+    return cached_upstream(f'info:{symbol}', lambda: yf_ticker(symbol).info, INFO_TTL)
+
+def get_ticker_history(symbol, period):
+    """Recent daily bars from yfinance, fetched once per host every BARS_TTL seconds"""
+    return cached_upstream(f'bars:{symbol}:{period}', lambda: yf_ticker(symbol).history(period=period), BARS_TTL)
+
+def get_market_clock():
+    """Market hours from Alpaca, fetched once per host every CLOCK_TTL seconds"""
+    def fetch_clock():
+        clock = api.get_clock()
+        return {'isOpen': clock.is_open, 'nextOpen': clock.next_open.isoformat(), 'nextClose': clock.next_close.isoformat()}
+    return cached_upstream('clock', fetch_clock, CLOCK_TTL, upstream='alpaca')
 
 # Popular stock symbols for watchlist
 DEFAULT_WATCHLIST = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'JPM', 'V', 'JNJ']
+
+# Major market indices
+MARKET_INDICES = {
+    'S&P 500': '^GSPC',
+    'Dow Jones': '^DJI',
+    'NASDAQ': '^IXIC',
+    'Russell 2000': '^RUT'
+}
  
 
 # Helper functions
@@ -77,39 +215,20 @@ def get_timeframe_params(timeframe):
 
 def format_chart_data(history_df):
     """Format dataframe to chart-friendly format"""
+    import pandas as pd
+
     if history_df.empty:
         return []
-        
-    # Reset index to make date a column
-    history_df = history_df.reset_index()
-    
-    # Convert timestamps to ISO format strings
-    history_df['Datetime'] = history_df['Datetime'].astype(str)
-    
-    # Format the response
-    chart_data = []
-    for _, row in history_df.iterrows():
-        data_point = {
-            'date': row['Datetime'],
-            'open': row['Open'],
-            'high': row['High'],
-            'low': row['Low'],
-            'close': row['Close'],
-            'volume': row['Volume']
-        }
-        chart_data.append(data_point)
-        
-    return chart_data
-
-class CustomJSONEncoder(JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (np.int64, np.int32, np.int16, np.int8)):
-            return int(obj)
-        elif isinstance(obj, (np.float64, np.float32, np.float16)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+
+    # Build the records column-wise instead of row by row
+    return pd.DataFrame({
+        'date': history_df.index.astype(str),
+        'open': history_df['Open'].to_numpy(),
+        'high': history_df['High'].to_numpy(),
+        'low': history_df['Low'].to_numpy(),
+        'close': history_df['Close'].to_numpy(),
+        'volume': history_df['Volume'].to_numpy()
+    }).to_dict('records')
 
 def calculate_daily_change(positions):
     total_market_value = float(sum(float(position.market_value) for position in positions))
@@ -121,9 +240,7 @@ def calculate_daily_change(positions):
     return weighted_daily_change * 100 
 
 
-app.json_encoder = CustomJSONEncoder
-
-@app.route('/api/account', methods=['GET'])
+@bp.route('/api/account', methods=['GET'])
 def get_account():
     """Get Alpaca account information"""
 
@@ -144,23 +261,18 @@ def get_account():
         logger.error(f"Error getting account: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/market/overview', methods=['GET'])
+@bp.route('/api/market/overview', methods=['GET'])
 def get_market_overview():
     try:
-        # Major market indices
-        indices = {
-            'S&P 500': '^GSPC',
-            'Dow Jones': '^DJI',
-            'NASDAQ': '^IXIC',
-            'Russell 2000': '^RUT'
-        }
-        
         result = {}
-        
-        for name, symbol in indices.items():
-            ticker = yf.Ticker(symbol)
-            # print(ticker.info)
-            data = ticker.history(period='1d')
+        error = None
+        for name, symbol in MARKET_INDICES.items():
+            try:
+                data = get_ticker_history(symbol, '1d')
+            except Exception as e:
+                logger.error(f"Error getting data for {symbol}: {str(e)}")
+                error = e
+                continue
 
             if not data.empty:
                 last_row = data.iloc[-1]
@@ -179,23 +291,128 @@ def get_market_overview():
                     'volume': last_row['Volume']
                 }
         
-        # Get market status from Alpaca
-        clock = api.get_clock()
-        
+        if not result and error is not None:
+            return upstream_error(error)
+
+        # Get market status from Alpaca; the indices are still worth showing without it
+        try:
+            market_status = get_market_clock()
+        except Exception as e:
+            logger.error(f"Error getting market clock: {str(e)}")
+            market_status = None
+
         return jsonify({
             'indices': result,
-            'marketStatus': {
-                'isOpen': clock.is_open,
-                'nextOpen': clock.next_open.isoformat(),
-                'nextClose': clock.next_close.isoformat()
-            }
+            'marketStatus': market_status,
+            'stale': bool(g.get('served_stale'))
         })
     except Exception as e:
         logger.error(f"Error getting market overview: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return upstream_error(e)
     
 
-@app.route('/api/congressman-trades', methods=['GET'])
+congress_trades = {'mtime': None, 'df': None}
+congress_lock = threading.Lock()
+
+def load_congress_trades(path='all_transactions.csv'):
+    """Read the congress CSV once and again only when the file changes"""
+    import pandas as pd
+
+    mtime = os.stat(path).st_mtime_ns
+    with congress_lock:
+        if congress_trades['mtime'] != mtime:
+            congress_trades['df'] = pd.read_csv(path)
+            congress_trades['mtime'] = mtime
+        return congress_trades['df']
+
+congress_rollups = CongressRollups()
+
+# Local daily bars; fill with `python disclosure_returns.py --refresh`
+bar_store = LazyObject(lambda: BarStore(os.getenv('BAR_STORE_PATH', 'bars.db')), 'bar_store')
+disclosure_returns = DisclosureReturns(bar_store)
+backtester = Backtester(bar_store)
+
+# Latest SMA/EMA/RSI/MACD/Bollinger per symbol, advanced bar by bar as new bars are cached
+indicator_tracker = IndicatorTracker()
+INDICATOR_PERIODS = ('6mo', '1y', '2y', '5y')
+
+screener = Screener(bar_store)
+# Daily bars for the screener universe are re-downloaded at most this often per host
+SCREENER_REFRESH_TTL = int(os.getenv('SCREENER_REFRESH_TTL', '900'))
+
+def screener_universe():
+    """universe.csv (SCREENER_UNIVERSE_PATH) if present, otherwise the most traded congress tickers"""
+    return default_universe(os.getenv('SCREENER_UNIVERSE_PATH', 'universe.csv'), load_congress_trades())
+
+# A full universe download can take minutes; other workers wait on it rather than repeat it
+SCREENER_REFRESH_LEASE = int(os.getenv('SCREENER_REFRESH_LEASE', '900'))
+# A symbols= list is downloaded like the universe, so it gets the same bound
+MAX_SCREENER_SYMBOLS = int(os.getenv('MAX_SCREENER_SYMBOLS', '500'))
+screener_refresh_lock = threading.Lock()
+screener_refreshing = None  # refresh key of the download this worker is running
+
+def screener_refresh_key(symbols):
+    return 'screener:refresh:' + hashlib.sha1(','.join(sorted(symbols)).encode()).hexdigest()[:12]
+
+def refresh_screener_bars(symbols):
+    """One batched download of the bars the universe is missing, shared by every worker"""
+    return shared_cache.get_or_set(screener_refresh_key(symbols), lambda: screener.refresh(symbols),
+                                   SCREENER_REFRESH_TTL, lease_seconds=SCREENER_REFRESH_LEASE)
+
+def refresh_screener_bars_later(symbols):
+    """Start refresh_screener_bars on a background thread unless it ran recently; True if one is running for these symbols
+
+    A worker runs one download at a time, so symbols asked for while another list is downloading
+    are not refreshed by this call.
+    """
+    global screener_refreshing
+    key = screener_refresh_key(symbols)
+    if shared_cache.get(key) is not None:
+        return False
+    if not screener_refresh_lock.acquire(blocking=False):
+        return screener_refreshing == key
+    screener_refreshing = key
+
+    def run():
+        global screener_refreshing
+        try:
+            refresh_screener_bars(symbols)
+        except Exception as e:
+            logger.error(f"Error refreshing screener bars: {str(e)}")
+        finally:
+            screener_refreshing = None
+            screener_refresh_lock.release()
+
+    threading.Thread(target=run, name='screener-refresh', daemon=True).start()
+    return True
+
+def get_congress_rollups():
+    """Rollups over the congress CSV, folding in any rows appended since the last call"""
+    added = congress_rollups.sync(load_congress_trades())
+    if added:
+        logger.info(f"Rolled up {added} new congressional transactions")
+    return congress_rollups
+
+def fetch_chart_data(symbol, timeframe):
+    start_date, end_date, interval = get_timeframe_params(timeframe)
+
+    # Get historical data from yfinance
+    ticker = yf_ticker(symbol)
+    history = ticker.history(start=start_date, end=end_date, interval=interval)
+
+    # Rename columns and prepare for JSON response
+    history.columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+    history.index.name = 'Datetime'
+
+    # Format the data for the chart
+    return format_chart_data(history)
+
+def chart_max_age(req):
+    # Intraday bars change every few minutes, daily bars at most once a day
+    return 60 if req.args.get('timeframe', '1d') in ('1d', '1w') else 900
+
+@bp.route('/api/congressman-trades', methods=['GET'])
+@conditional(max_age=300, public=True)
 def get_congressman_trades():
     """Get trading data for Congressmen from CSV file with pagination support"""
     try:
@@ -204,7 +421,7 @@ def get_congressman_trades():
         page_size = request.args.get('page_size', default=100, type=int)
         
         # Read the CSV file
-        trades_df = pd.read_csv('all_transactions.csv')
+        trades_df = load_congress_trades()
         
         # Get total count for the frontend pagination
         total_count = len(trades_df)
@@ -230,21 +447,149 @@ def get_congressman_trades():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/market/watchlist', methods=['GET'])
+@bp.route('/api/congressman-trades/rollups', methods=['GET'])
+def get_congress_rollup_summary():
+    """Row count, totals and size of each precomputed congress rollup"""
+    try:
+        return jsonify(get_congress_rollups().summary())
+    except Exception as e:
+        logger.error(f"Error getting congress rollups: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/congressman-trades/rollups/<name>', methods=['GET'])
+def get_congress_rollup(name):
+    """Top tickers, members, sectors or months of congress trades, e.g. ?by=volume&limit=20"""
+    try:
+        ascending = request.args.get('order')
+        rollup = get_congress_rollups().query(
+            name,
+            by=request.args.get('by'),
+            ascending=None if ascending is None else ascending == 'asc',
+            limit=max(1, min(request.args.get('limit', default=20, type=int), 1000)),
+            offset=max(request.args.get('offset', default=0, type=int), 0)
+        )
+        return jsonify(dict(rollup, name=name))
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting congress rollup {name}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/congressman-trades/performance', methods=['GET'])
+def get_congress_performance():
+    """Members ranked by how the tickers they disclosed moved afterwards, e.g. ?horizon=30&by=hit_rate"""
+    try:
+        members = disclosure_returns.members(
+            load_congress_trades(),
+            horizon=request.args.get('horizon', default=30, type=int),
+            min_trades=request.args.get('min_trades', default=5, type=int),
+            by=request.args.get('by', 'hit_rate'),
+            limit=max(1, min(request.args.get('limit', default=20, type=int), 500)),
+            ascending=request.args.get('order') == 'asc'
+        )
+        return jsonify({'horizons': list(disclosure_returns.horizons), 'members': members})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting congress performance: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/congressman-trades/performance/trades', methods=['GET'])
+def get_congress_trade_returns():
+    """Forward returns of individual disclosed trades, filtered by representative and/or ticker"""
+    try:
+        trades = disclosure_returns.trades(
+            load_congress_trades(),
+            representative=request.args.get('representative'),
+            ticker=request.args.get('ticker'),
+            limit=max(1, min(request.args.get('limit', default=100, type=int), 1000))
+        )
+        return jsonify(trades)
+    except Exception as e:
+        logger.error(f"Error getting congress trade returns: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/backtest', methods=['GET'])
+def get_backtest():
+    """Momentum or swing strategy over stored daily bars, e.g. ?strategy=momentum&symbols=AAPL,MSFT&start=2020-01-01
+
+    Any other query parameter overrides a strategy setting (lookback=63, entry_z=1.5, ...).
+    Without symbols the whole bar store is the universe. Only stored bars are used; a request never
+    waits on a download (`python backtest.py --refresh` fetches missing symbols).
+    """
+    try:
+        strategy = request.args.get('strategy', 'momentum')
+        symbols = request.args.get('symbols')
+        reserved = {'strategy', 'symbols', 'start', 'end', 'refresh'}  # refresh is accepted but ignored
+        params = {k: v for k, v in request.args.items() if k not in reserved}
+        result = backtester.run(
+            strategy,
+            symbols=symbols.split(',') if symbols else None,
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            **params
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'strategies': STRATEGIES}), 400
+    except Exception as e:
+        logger.error(f"Error running backtest: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/screener', methods=['GET'])
+def get_screener():
+    """Rank symbols passing trend/volatility/volume/52-week filters, e.g. ?trend=strongly_bullish&days=21&near_high=0.05
+
+    Filters: trend (comma-separated), above_sma50, and min/max bounds in SCREENER_FILTERS.
+    symbols=AAPL,MSFT,... (at most MAX_SCREENER_SYMBOLS) replaces the default universe. Results come from stored bars; missing
+    or outdated bars are downloaded in the background (refresh=0 skips that) and show up in later screens.
+    """
+    try:
+        symbols = request.args.get('symbols')
+        if symbols:
+            symbols = list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
+            if len(symbols) > MAX_SCREENER_SYMBOLS:
+                raise ValueError(f'At most {MAX_SCREENER_SYMBOLS} symbols per screen')
+        else:
+            symbols = screener_universe()
+        refreshing = request.args.get('refresh', '1') == '1' and refresh_screener_bars_later(symbols)
+
+        reserved = {'symbols', 'refresh', 'days', 'sort', 'order', 'limit', 'trend', 'above_sma50'}
+        above = request.args.get('above_sma50')
+        result = screener.run(
+            symbols,
+            days=request.args.get('days', default=21, type=int),
+            sort=request.args.get('sort', 'return'),
+            ascending=request.args.get('order') == 'asc',
+            limit=max(1, min(request.args.get('limit', default=25, type=int), 500)),
+            trend=request.args.get('trend'),
+            above_sma50=None if above is None else above in ('1', 'true'),
+            **{k: v for k, v in request.args.items() if k not in reserved}
+        )
+        return jsonify(dict(result, refreshing=refreshing))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'filters': list(SCREENER_FILTERS)}), 400
+    except Exception as e:
+        logger.error(f"Error running screener: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/market/watchlist', methods=['GET'])
 def get_watchlist():
     try:
         result = []
+        error = None
         for symbol in DEFAULT_WATCHLIST:
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                hist = ticker.history(period='2d')
+                info = get_ticker_info(symbol)
+                hist = get_ticker_history(symbol, '2d')
                 
                 if not hist.empty and len(hist) > 1:
-                    last_close = float(hist['Close'].iloc[-1])  # Convert to float
-                    prev_close = float(hist['Close'].iloc[-2])  # Convert to float
-                    change = float(last_close - prev_close)     # Convert to float
-                    change_percent = float((change / prev_close) * 100)  # Convert to float
+                    last_close = hist['Close'].iloc[-1]
+                    prev_close = hist['Close'].iloc[-2]
+                    change = last_close - prev_close
+                    change_percent = (change / prev_close) * 100
                     
                     stock_data = {
                         'symbol': symbol,
@@ -252,28 +597,28 @@ def get_watchlist():
                         'price': last_close,
                         'change': change,
                         'changePercent': change_percent,
-                        'volume': int(hist['Volume'].iloc[-1])  # Convert to int
+                        'volume': hist['Volume'].iloc[-1]
                     }
                     result.append(stock_data)
             except Exception as stock_error:
                 logger.error(f"Error getting data for {symbol}: {str(stock_error)}")
+                error = stock_error
                 continue
-        
+
+        if not result and error is not None:
+            return upstream_error(error)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error getting watchlist: {str(e)}\n{traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/stocks/<symbol>', methods=['GET'])
+@bp.route('/api/stocks/<symbol>', methods=['GET'])
 def get_stock_data(symbol):
     try:
-        ticker = yf.Ticker(symbol)
-        # print(symbol)
         # Get company info
-        info = ticker.info
-        # print(info)
+        info = get_ticker_info(symbol)
         # Get recent quote data
-        hist = ticker.history(period='5d')
+        hist = get_ticker_history(symbol, '5d')
         
         if hist.empty:
             return jsonify({'error': 'No data available for this symbol'}), 404
@@ -315,38 +660,52 @@ def get_stock_data(symbol):
                 '52weekLow': info.get('fiftyTwoWeekLow', 0),
                 'avgVolume': info.get('averageVolume', 0),
                 'recommendation': info.get('recommendationKey', 'N/A')
-            }
+            },
+            'stale': bool(g.get('served_stale'))
         }
         
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error getting stock data for {symbol}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return upstream_error(e)
 
-@app.route('/api/stocks/<symbol>/chart', methods=['GET'])
+@bp.route('/api/stocks/<symbol>/chart', methods=['GET'])
+@conditional(max_age=chart_max_age, public=True)
 def get_stock_chart_data(symbol):
     try:
         timeframe = request.args.get('timeframe', '1d')
         
-        start_date, end_date, interval = get_timeframe_params(timeframe)
-        
-        # Get historical data from yfinance
-        ticker = yf.Ticker(symbol)
-        history = ticker.history(start=start_date, end=end_date, interval=interval)
-        
-        # Rename columns and prepare for JSON response
-        history.columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
-        history.index.name = 'Datetime'
-        
-        # Format the data for the chart
-        chart_data = format_chart_data(history)
+        chart_data = shared_cache.get_or_set(f'chart:{symbol}:{timeframe}', lambda: fetch_chart_data(symbol, timeframe),
+                                             chart_max_age(request))
         
         return jsonify(chart_data)
     except Exception as e:
         logger.error(f"Error getting chart data for {symbol}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/positions', methods=['GET'])
+@bp.route('/api/stocks/<symbol>/indicators', methods=['GET'])
+def get_stock_indicators(symbol):
+    """Latest technical indicators from the cached daily bars, e.g. ?period=1y&points=60 for a series too"""
+    try:
+        symbol = symbol.upper()
+        period = request.args.get('period', '1y')
+        if period not in INDICATOR_PERIODS:
+            return jsonify({'error': f'period must be one of {", ".join(INDICATOR_PERIODS)}'}), 400
+        points = min(request.args.get('points', default=0, type=int), 1000)
+
+        bars = get_ticker_history(symbol, period)
+        latest = indicator_tracker.latest(f'{symbol}:{period}', bars)
+        if latest is None:
+            return jsonify({'error': f'No bars for {symbol}'}), 404
+        result = {'symbol': symbol, 'period': period, 'latest': latest}
+        if points > 0:
+            result['series'] = indicator_series(bars, points)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error getting indicators for {symbol}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/positions', methods=['GET'])
 def get_positions():
     """Get current positions from Alpaca"""
     try:
@@ -356,9 +715,7 @@ def get_positions():
         for position in positions:
             # Get additional data from yfinance for UI enhancement
             try:
-                ticker = yf.Ticker(position.symbol)
-                info = ticker.info
-                # print("info", info)
+                info = get_ticker_info(position.symbol)
                 name = info.get('shortName', position.symbol)
             except:
                 name = position.symbol
@@ -383,7 +740,7 @@ def get_positions():
         logger.error(f"Error getting positions: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/positions/<symbol>', methods=['DELETE'])
+@bp.route('/api/positions/<symbol>', methods=['DELETE'])
 def close_position(symbol):
     try:
         # Close the position using Alpaca API
@@ -393,17 +750,39 @@ def close_position(symbol):
         logger.error(f"Error closing position for {symbol}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/positions', methods=['DELETE'])
+def close_single_position(symbol):
+    try:
+        api.close_position(symbol)
+        return {'symbol': symbol, 'success': True}
+    except Exception as e:
+        logger.error(f"Error closing position for {symbol}: {str(e)}")
+        return {'symbol': symbol, 'success': False, 'error': str(e)}
+
+@bp.route('/api/positions', methods=['DELETE'])
 def close_all_positions():
     try:
-        # Close all positions using Alpaca API
-        api.close_all_positions()
-        return jsonify({'success': True, 'message': 'All positions closed successfully'})
+        timer = StageTimer()
+        positions = api.list_positions()
+        timer.mark('list')
+
+        # Close positions concurrently so per-symbol failures are reported individually
+        results = list(order_pool.map(close_single_position, [position.symbol for position in positions]))
+        timer.mark('close')
+
+        failed = [r for r in results if not r['success']]
+        response = jsonify({
+            'success': not failed,
+            'message': 'All positions closed successfully' if not failed else f'{len(failed)} of {len(results)} positions failed to close',
+            'results': results,
+            'timing': timer.stages
+        })
+        response.headers['Server-Timing'] = timer.server_timing()
+        return response, 200 if not failed else 207
     except Exception as e:
         logger.error(f"Error closing all positions: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/portfolio/summary', methods=['GET'])
+@bp.route('/api/portfolio/summary', methods=['GET'])
 def get_portfolio_summary():
     """Get portfolio summary from Alpaca"""
     try:
@@ -439,7 +818,8 @@ def get_portfolio_summary():
         logger.error(f"Error getting portfolio summary: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/portfolio/history', methods=['GET'])
+@bp.route('/api/portfolio/history', methods=['GET'])
+@conditional(max_age=60)
 def get_portfolio_history():
     """Get historical portfolio performance"""
 
@@ -515,7 +895,10 @@ def get_portfolio_history():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/recommendations', methods=['GET'])
+# 'user' (similar users' trades) or 'item' (symbols similar to the user's holdings)
+RECOMMENDER = os.getenv('RECOMMENDER', 'user')
+
+@bp.route('/api/recommendations', methods=['GET'])
 def get_recommendations():
     try:
         orders = api.list_orders(status="all", limit=100, nested=True)
@@ -534,7 +917,13 @@ def get_recommendations():
             })
 
         # pprint.pprint(trade_input)
-        choices = get_top_choices(trade_input)
+        if request.args.get('model', RECOMMENDER) == 'item':
+            # Neighbors of the user's own holdings, precomputed offline
+            from model.item_model import get_top_item_choices
+            choices = get_top_item_choices(trade_input)
+        else:
+            from model.model import get_top_choices  # pulls in scikit-learn and the stored model
+            choices = get_top_choices(trade_input)
 
         return jsonify(choices)
     
@@ -542,14 +931,28 @@ def get_recommendations():
         logger.error(f"Error getting orders: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-# @app.route('/api/complete', methods=['POST'])
+
+@bp.route('/api/recommendations/model', methods=['GET'])
+def get_recommendation_model():
+    """Which item-model version this worker is serving"""
+    try:
+        from model.item_model import registry
+        registry.get()
+        return jsonify(registry.info())
+    except Exception as e:
+        logger.error(f"Error getting recommendation model: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# @bp.route('/api/complete', methods=['POST'])
 def complete(message):
+    from google import genai
     client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-    response = client.models.generate_content(model="gemini-2.0-flash", contents=message)
+    with metrics.track_upstream('gemini', 'generate_content'):
+        response = client.models.generate_content(model="gemini-2.0-flash", contents=message)
     string = response.candidates[0].content.parts[0].text
     return string
 
-@app.route('/api/recommendation-info/<ticker>', methods=['GET'])
+@bp.route('/api/recommendation-info/<ticker>', methods=['GET'])
 def reason(ticker):
 
     # stock_info =  data["stock_info"]
@@ -570,14 +973,13 @@ def reason(ticker):
             'trade_type': order.side
         })
 
-    ticker = yf.Ticker(ticker)
-    info = ticker.info
+    info = get_ticker_info(ticker)
 
     result = complete(f"Justify the purchasing of {ticker} stock given its {info} and the history of the persons stocks. History: \n{trade_history}. Make this incredibly short.")
     return jsonify({"info":info,"result":result}), 200
 
 
-@app.route('/api/orders', methods=['GET'])
+@bp.route('/api/orders', methods=['GET'])
 def get_orders():
     try:
         status = request.args.get('status', 'all')
@@ -627,34 +1029,125 @@ def get_orders():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/stocks/<symbol>/news', methods=['GET'])
+@bp.route('/api/stocks/<symbol>/news', methods=['GET'])
 def get_stock_news(symbol):
     try:
-        # Use Finnhub to get company news
-        today = datetime.now().strftime('%Y-%m-%d')
-        week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        
-        news_response = finnhub_client.company_news(symbol, _from=week_ago, to=today, )
-        print(news_response)
-        
-        # Limit to 10 news items
-        return jsonify(news_response[:10] if news_response else [])
+        limit = max(1, min(request.args.get('limit', default=10, type=int), 200))
+        items = news_cache.get(symbol, limit=limit)
+        if not news_cache.is_fresh(symbol.upper()):
+            g.served_stale = True
+        return jsonify(items)
     except Exception as e:
-        print(e)
         logger.error(f"Error getting stock news for {symbol}: {str(e)}")
-        return jsonify({"error": str(e)}), 200  # Return empty array on error
+        return upstream_error(e)
+
+@bp.route('/api/news', methods=['GET'])
+def get_batch_news():
+    """Get merged news for several symbols (defaults to held positions, then the watchlist)"""
+    try:
+        limit = max(1, min(request.args.get('limit', default=30, type=int), 200))
+        symbols = request.args.get('symbols')
+        if symbols:
+            symbols = [s.strip() for s in symbols.split(',') if s.strip()]
+        elif request.args.get('source') == 'watchlist':
+            symbols = DEFAULT_WATCHLIST
+        else:
+            symbols = [position.symbol for position in api.list_positions()] or DEFAULT_WATCHLIST
+
+        items, errors = news_cache.get_many(symbols, limit=limit)
+        for symbol, error in errors.items():
+            logger.error(f"Error getting stock news for {symbol}: {error}")
+
+        return jsonify({'symbols': symbols, 'news': items, 'errors': errors})
+    except Exception as e:
+        logger.error(f"Error getting batch news: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/search', methods=['GET'])
+def search():
+    """Keyword/ticker search over indexed news and congressional transactions"""
+    try:
+        query = request.args.get('q', '')
+        symbol = request.args.get('symbol')
+        kind = request.args.get('kind')
+        limit = max(1, min(request.args.get('limit', default=20, type=int), 100))
+
+        if not query and not symbol:
+            return jsonify({'error': 'Missing q or symbol parameter'}), 400
+
+        return jsonify(search_index.search(query, symbol=symbol, kind=kind, limit=limit))
+    except Exception as e:
+        logger.error(f"Error searching for {request.args.get('q')}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 import re
 
-@app.route('/api/stocks/<symbol>/yahoo', methods=['GET'])
+def build_symbol_index():
+    """Autocomplete index over a local listing file, the recommender's symbols and congress tickers"""
+    import pandas as pd
+
+    index = SymbolIndex()
+    listing_path = os.getenv('SYMBOL_LISTING_PATH', 'symbols.csv')
+    if os.path.exists(listing_path):
+        # CSV or pipe-delimited exchange listing (e.g. nasdaqlisted.txt) with a symbol and a name column
+        try:
+            with open(listing_path) as f:
+                sep = '|' if '|' in f.readline() else ','
+            listing = pd.read_csv(listing_path, sep=sep)
+            columns = {c.lower(): c for c in listing.columns}
+            symbol_col = next(columns[c] for c in ('symbol', 'ticker', 'act symbol') if c in columns)
+            name_col = next((columns[c] for c in ('security name', 'name', 'company name', 'company') if c in columns), None)
+            names = listing[name_col] if name_col else [None] * len(listing)
+            for symbol, name in zip(listing[symbol_col], names):
+                index.add(symbol, name, source='listing')
+        except Exception as e:
+            logger.error(f"Error reading symbol listing {listing_path}: {str(e)}")
+
+    # Congress tickers, weighted by how often they were traded, named by their most common description
+    trades = load_congress_trades()
+    tickers = trades['ticker'].astype(str).str.upper()
+    counts = tickers.value_counts()
+    names = (trades.assign(ticker=tickers).dropna(subset=['asset_description'])
+             .groupby('ticker')['asset_description'].agg(lambda s: s.value_counts().index[0]))
+    for symbol, count in counts.items():
+        index.add(symbol, names.get(symbol), weight=int(count), source='congress')
+
+    try:
+        from model.model import get_loaded_model
+        for symbol in get_loaded_model()['trade_matrix'].columns:
+            index.add(symbol, weight=1, source='recommender')
+    except Exception as e:
+        logger.error(f"Error loading recommender symbols: {str(e)}")
+
+    for symbol in DEFAULT_WATCHLIST:
+        index.add(symbol, weight=1, source='watchlist')
+
+    index.build()
+    logger.info(f"Built symbol index: {index.stats()}")
+    return index
+
+symbol_index = LazyObject(build_symbol_index, 'symbol_index')
+
+@bp.route('/api/symbols/search', methods=['GET'])
+def search_symbols():
+    """Ticker/company name autocomplete"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', default=10, type=int)
+        return jsonify({'query': query, 'results': symbol_index.search(query, limit=limit)})
+    except Exception as e:
+        logger.error(f"Error searching symbols for {request.args.get('q')}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/stocks/<symbol>/yahoo', methods=['GET'])
+@conditional(max_age=900, public=True)
 def get_yahoo_finance_data(symbol):
     try:
         if not re.match(r'^[A-Z0-9.-]{1,10}$', symbol):
             return jsonify({'error': 'Invalid symbol format'}), 400
             
         # Get data from Yahoo Finance
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        info = get_ticker_info(symbol)
         
         # Extract relevant financial metrics
         yahoo_data = {
@@ -683,7 +1176,7 @@ def get_yahoo_finance_data(symbol):
         return jsonify({'error': 'Failed to retrieve data', 'details': str(e)}), 500
 
 
-@app.route('/api/orders/<order_id>', methods=['DELETE'])
+@bp.route('/api/orders/<order_id>', methods=['DELETE'])
 def cancel_order(order_id):
     """Cancel an open order"""
     try:
@@ -693,65 +1186,333 @@ def cancel_order(order_id):
         logger.error(f"Error canceling order {order_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/orders', methods=['POST'])
+ORDER_SIDES = {'buy', 'sell'}
+ORDER_TYPES = {'market', 'limit', 'stop', 'stop_limit', 'trailing_stop'}
+ORDER_TIME_IN_FORCE = {'day', 'gtc', 'opg', 'cls', 'ioc', 'fok'}
+
+def validate_order(data):
+    """Check an order payload locally and return (order kwargs, notional, error message)"""
+    if not isinstance(data, dict):
+        return None, None, 'Request body must be a JSON object'
+
+    symbol = data.get('symbol')
+    qty = data.get('qty')
+    notional = data.get('notional')
+    side = data.get('side')
+    type = data.get('type', 'market')
+    time_in_force = data.get('timeInForce', 'day')
+    limit_price = data.get('limitPrice')
+    stop_price = data.get('stopPrice')
+    trail_price = data.get('trailPrice')
+    trail_percent = data.get('trailPercent')
+
+    # Validate required parameters
+    if not all([symbol, side]):
+        return None, None, 'Missing required parameters'
+    if not re.match(r'^[A-Z0-9.-]{1,10}$', str(symbol).upper()):
+        return None, None, 'Invalid symbol format'
+    if side not in ORDER_SIDES:
+        return None, None, f'Invalid side: {side}'
+    if type not in ORDER_TYPES:
+        return None, None, f'Invalid order type: {type}'
+    if time_in_force not in ORDER_TIME_IN_FORCE:
+        return None, None, f'Invalid time in force: {time_in_force}'
+    if bool(qty) == bool(notional):
+        return None, None, 'Exactly one of qty or notional is required'
+    try:
+        qty = float(qty) if qty else None
+        notional = float(notional) if notional else None
+        limit_price = float(limit_price) if limit_price else None
+        stop_price = float(stop_price) if stop_price else None
+        trail_price = float(trail_price) if trail_price else None
+        trail_percent = float(trail_percent) if trail_percent else None
+    except (TypeError, ValueError):
+        return None, None, 'qty, notional and prices must be numbers'
+    if (qty is not None and qty <= 0) or (notional is not None and notional <= 0):
+        return None, None, 'qty and notional must be positive'
+    if type in ('limit', 'stop_limit') and limit_price is None:
+        return None, None, f'limitPrice is required for {type} orders'
+    if type in ('stop', 'stop_limit') and stop_price is None:
+        return None, None, f'stopPrice is required for {type} orders'
+    if type == 'trailing_stop' and (trail_price is None) == (trail_percent is None):
+        return None, None, 'Exactly one of trailPrice or trailPercent is required for trailing_stop orders'
+    if type != 'trailing_stop' and (trail_price is not None or trail_percent is not None):
+        return None, None, 'trailPrice and trailPercent only apply to trailing_stop orders'
+    if (trail_price is not None and trail_price <= 0) or (trail_percent is not None and trail_percent <= 0):
+        return None, None, 'trailPrice and trailPercent must be positive'
+
+    order_args = {
+        'symbol': str(symbol).upper(),
+        'qty': qty,
+        'side': side,
+        'type': type,
+        'time_in_force': time_in_force,
+        'limit_price': limit_price,
+        'stop_price': stop_price,
+        'trail_price': trail_price,
+        'trail_percent': trail_percent
+    }
+    return order_args, notional, None
+
+def get_last_price(symbol):
+    """Latest trade price from Alpaca, cached for a few seconds"""
+    return shared_cache.get_or_set(f'quote:{symbol}', lambda: float(api.get_latest_trade(symbol).price), QUOTE_TTL)
+
+def prefetch_last_prices(symbols):
+    """Warm the price cache for several symbols with a single Alpaca request"""
+    missing = [symbol for symbol in dict.fromkeys(symbols) if shared_cache.get(f'quote:{symbol}') is None]
+    if missing:
+        for symbol, trade in api.get_latest_trades(missing).items():
+            shared_cache.set(f'quote:{symbol}', float(trade.price), QUOTE_TTL)
+
+def is_native_notional(order_args):
+    # Alpaca accepts notional amounts directly on market day orders
+    return order_args['type'] == 'market' and order_args['time_in_force'] == 'day'
+
+def needs_reference_price(order_args, notional):
+    return notional is not None and not is_native_notional(order_args) and order_args['limit_price'] is None
+
+def price_order(order_args, notional):
+    """Size a notional order, letting Alpaca do it natively where it supports that"""
+    if notional is None:
+        return order_args
+    if is_native_notional(order_args):
+        return dict(order_args, qty=None, notional=round(notional, 2))
+    reference_price = order_args['limit_price'] or get_last_price(order_args['symbol'])
+    return dict(order_args, qty=round(notional / reference_price, 6))
+
+def submit_to_alpaca(order_args):
+    return api.submit_order(**order_args)
+
+def format_submitted_order(order):
+    return {
+        'id': order.id,
+        'symbol': order.symbol,
+        'qty': float(order.qty) if order.qty else None,
+        'notional': float(order.notional) if getattr(order, 'notional', None) else None,
+        'side': order.side,
+        'type': order.type,
+        'timeInForce': order.time_in_force,
+        'status': order.status,
+        'createdAt': str(order.created_at),
+    }
+
+@bp.route('/api/orders', methods=['POST'])
 def place_order():
     try:
-        data = request.json
-        # print(data)
-        
-        symbol = data.get('symbol')
-        qty = data.get('qty')
-        notional = data.get('notional')
-        side = data.get('side')
-        type = data.get('type', 'market')
-        time_in_force = data.get('timeInForce', 'day')
-        limit_price = data.get('limitPrice')
-        stop_price = data.get('stopPrice')
-        
-        # Validate required parameters
-        if not all([symbol, side]):
-            return jsonify({'error': 'Missing required parameters'}), 400
-        
-        # Convert notional to qty if notional is provided
-        if notional:
-            ticker = yf.Ticker(symbol)
-            current_price = ticker.history(period='1d')['Close'].iloc[-1]
-            qty = notional / current_price
-        
+        timer = StageTimer()
+        data = request.get_json(silent=True)
+
+        order_args, notional, error = validate_order(data)
+        if error:
+            return jsonify({'error': error}), 400
+        timer.mark('validate')
+
+        order_args = price_order(order_args, notional)
+        timer.mark('price')
+
         # Place order via Alpaca
-        order = api.submit_order(
-            symbol=symbol,
-            qty=qty,
-            side=side,
-            type=type,
-            time_in_force=time_in_force,
-            limit_price=limit_price,
-            stop_price=stop_price
-        )
-        
-        # Format response
-        order_data = {
-            'id': order.id,
-            'symbol': order.symbol,
-            'qty': float(order.qty),
-            'side': order.side,
-            'type': order.type,
-            'timeInForce': order.time_in_force,
-            'status': order.status,
-            'createdAt': str(order.created_at),
-        }
-        return jsonify(order_data), 201
-    except Exception as e:
-        logger.error(f"Error placing order: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        order = submit_to_alpaca(order_args)
+        timer.mark('submit')
 
-if __name__ == '__main__':
-    # Create a .env file with FLASK_ENV=development for development
-    app.run(debug=os.getenv('FLASK_ENV') == 'development', host='0.0.0.0', port=5001)
+        order_data = format_submitted_order(order)
+        timer.mark('format')
 
+        order_latency.record(timer)
+        logger.info(f"Placed order {order.id} for {order.symbol}: {timer.server_timing()}")
 
+        response = jsonify(order_data)
+        response.headers['Server-Timing'] = timer.server_timing()
+        return response, 201
+    except Exception as e:
+        logger.error(f"Error placing order: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
+def submit_leg(index, order_args):
+    timer = StageTimer()
+    try:
+        order = submit_to_alpaca(order_args)
+        timer.mark('submit')
+        return {'index': index, 'symbol': order_args['symbol'], 'success': True,
+                'order': format_submitted_order(order), 'submitMs': timer.total_ms}
+    except Exception as e:
+        timer.mark('submit')
+        logger.error(f"Error placing order for {order_args['symbol']}: {str(e)}")
+        return {'index': index, 'symbol': order_args['symbol'], 'success': False,
+                'error': str(e), 'submitMs': timer.total_ms}
+
+@bp.route('/api/orders/batch', methods=['POST'])
+def place_batch_orders():
+    """Validate, price and concurrently submit a basket of orders"""
+    try:
+        timer = StageTimer()
+        data = request.get_json(silent=True)
+        legs = data.get('orders') if isinstance(data, dict) else data
+        if not isinstance(legs, list) or not legs:
+            return jsonify({'error': 'Expected a non-empty list of orders'}), 400
+        if len(legs) > MAX_BATCH_ORDERS:
+            return jsonify({'error': f'At most {MAX_BATCH_ORDERS} orders per batch'}), 400
+
+        # Reject the whole basket if any leg is malformed
+        validated = []
+        errors = []
+        for index, leg in enumerate(legs):
+            order_args, notional, error = validate_order(leg)
+            if error:
+                errors.append({'index': index, 'symbol': leg.get('symbol') if isinstance(leg, dict) else None, 'error': error})
+            validated.append((order_args, notional))
+        if errors:
+            return jsonify({'error': 'Invalid orders in batch', 'legs': errors}), 400
+        timer.mark('validate')
+
+        prefetch_last_prices([args['symbol'] for args, notional in validated if needs_reference_price(args, notional)])
+        priced = [price_order(args, notional) for args, notional in validated]
+        timer.mark('price')
+
+        futures = [order_pool.submit(submit_leg, index, args) for index, args in enumerate(priced)]
+        results = [future.result() for future in futures]
+        timer.mark('submit')
+
+        batch_latency.record(timer)
+        failed = sum(1 for result in results if not result['success'])
+        response = jsonify({
+            'results': results,
+            'submitted': len(results) - failed,
+            'failed': failed,
+            'timing': dict(timer.stages, total=timer.total_ms)
+        })
+        response.headers['Server-Timing'] = timer.server_timing()
+        return response, 201 if not failed else 207
+    except Exception as e:
+        logger.error(f"Error placing batch orders: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/orders/latency', methods=['GET'])
+def get_order_latency():
+    """Percentiles of recent order placement timings per stage, in milliseconds; batches are reported separately"""
+    return jsonify(dict(order_latency.summary(), batches=batch_latency.summary()))
 
+def sync_congress_index():
+    try:
+        added = search_index.sync_congress_csv('all_transactions.csv')
+        logger.info(f"Indexed {added} new congressional transactions")
+    except Exception as e:
+        logger.error(f"Error indexing congressional transactions: {str(e)}")
+    try:
+        get_congress_rollups()
+    except Exception as e:
+        logger.error(f"Error rolling up congressional transactions: {str(e)}")
 
+def warm_disclosure_returns():
+    try:
+        disclosure_returns.compute(load_congress_trades())
+    except Exception as e:
+        logger.error(f"Error computing disclosure returns: {str(e)}")
+
+def warm_symbol(symbol, ttl, chart=True):
+    """Refresh the bars (and optionally the intraday chart) the UI asks for first"""
+    # One 5-day download covers the 1d/2d/5d quote lookups
+    hist = get_breaker('yfinance').call(lambda: yf_ticker(symbol).history(period='5d'))
+    for period, rows in (('1d', 1), ('2d', 2), ('5d', 5)):
+        shared_cache.set_fresh(f'bars:{symbol}:{period}', hist.tail(rows), ttl, STALE_TTL)
+    if chart:
+        get_ticker_info(symbol)
+        shared_cache.set(f'chart:{symbol}:1d', fetch_chart_data(symbol, '1d'), ttl)
+
+def warm_caches(interval):
+    """Pre-fetch index, watchlist and position data so user requests hit warm caches"""
+    def run_cycle():
+        try:
+            positions = [position.symbol for position in api.list_positions()]
+        except Exception as e:
+            logger.error(f"Error listing positions for prefetch: {str(e)}")
+            positions = []
+
+        # Keep entries alive a little past the next refresh
+        ttl = interval + BARS_TTL
+        jobs = [(symbol, False) for symbol in MARKET_INDICES.values()]
+        jobs += [(symbol, True) for symbol in dict.fromkeys(DEFAULT_WATCHLIST + positions)]
+        futures = {symbol: prefetch_pool.submit(warm_symbol, symbol, ttl, chart) for symbol, chart in jobs}
+
+        failed = []
+        for symbol, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error prefetching {symbol}: {str(e)}")
+                failed.append(symbol)
+
+        # Keep the screener universe's daily bars current (at most once per SCREENER_REFRESH_TTL)
+        try:
+            refresh_screener_bars(screener_universe())
+        except Exception as e:
+            logger.error(f"Error refreshing screener bars: {str(e)}")
+        return {'symbols': len(futures), 'failed': failed}
+
+    # Under gunicorn every worker runs a scheduler; only one per host does each cycle, and the
+    # others wait on its lease for as long as a slow cycle can take rather than start their own
+    return shared_cache.get_or_set('prefetch:cycle', run_cycle, max(interval - 5, 1), lease_seconds=PREFETCH_LEASE_SECONDS)
+
+PREFETCH_LEASE_SECONDS = int(os.getenv('PREFETCH_LEASE_SECONDS', '600'))
+prefetch_pool = ThreadPoolExecutor(max_workers=int(os.getenv('PREFETCH_CONCURRENCY', '4')))
+prefetcher = PrefetchScheduler(
+    warm_caches,
+    lambda: api.get_clock(),
+    open_interval=int(os.getenv('PREFETCH_OPEN_INTERVAL', '30')),
+    closed_interval=int(os.getenv('PREFETCH_CLOSED_INTERVAL', '900'))
+)
+
+@bp.route('/api/prefetch', methods=['GET'])
+def get_prefetch_status():
+    """State of the background cache warmer"""
+    return jsonify(prefetcher.stats())
+
+startup = {'import_ms': None, 'create_app_ms': None, 'first_response_ms': None}
+
+@bp.route('/api/upstreams', methods=['GET'])
+def get_upstream_status():
+    """Circuit breaker state per upstream"""
+    return jsonify({name: breaker.stats() for name, breaker in breakers.items()})
+
+@bp.route('/api/startup', methods=['GET'])
+def get_startup_report():
+    """Cold start timings and how long each lazily built client took to construct"""
+    clients = {lazy._name: lazy.init_ms for lazy in (api, finnhub_client, search_index, shared_cache, symbol_index, bar_store)}
+    return jsonify(dict(startup, clients=clients))
+
+def create_app(sync_index=True, prefetch=None):
+    """Build the Flask app; upstream clients and heavy libraries load on first request"""
+    started = time.perf_counter()
+    if startup['import_ms'] is None:
+        startup['import_ms'] = (started - IMPORT_STARTED) * 1000
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    CORS(app)
+    metrics.init_app(app, timing_header=os.getenv('TIMING_HEADER') == '1')
+    app.register_blueprint(bp)
+
+    @app.after_request
+    def record_first_response(response):
+        if startup['first_response_ms'] is None:
+            startup['first_response_ms'] = (time.perf_counter() - IMPORT_STARTED) * 1000
+            logger.info(f"Startup: {startup}")
+        return response
+
+    if sync_index:
+        # Pick up rows appended to the congress CSV and build autocomplete without blocking startup
+        threading.Thread(target=sync_congress_index, daemon=True).start()
+        threading.Thread(target=lambda: symbol_index.stats(), daemon=True).start()
+        threading.Thread(target=warm_disclosure_returns, daemon=True).start()
+
+    if prefetch is None:
+        prefetch = os.getenv('PREFETCH', '1') == '1'
+    if prefetch:
+        prefetcher.start()
+
+    startup['create_app_ms'] = (time.perf_counter() - started) * 1000
+    return app
 
+if __name__ == '__main__':
+    # Create a .env file with FLASK_ENV=development for development
+    create_app().run(debug=os.getenv('FLASK_ENV') == 'development', host='0.0.0.0', port=5001)
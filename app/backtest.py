@@ -0,0 +1,277 @@
+"""Vectorized backtests of the chatbot's momentum and swing trading strategies.
+
+Every strategy works on a date x symbol matrix of closes, so a whole universe is evaluated with
+array operations instead of a loop per symbol. Run against the local bar store:
+
+    python backtest.py momentum --start 2019-01-01
+    python backtest.py swing --symbols AAPL,MSFT,NVDA --refresh
+"""
+import argparse
+import sys
+import threading
+from datetime import date, timedelta
+
+from indicators import rolling_mean_std
+
+TRADING_DAYS = 252
+MAX_CURVE_POINTS = 500
+
+# Strategy -> default parameters; requests may override any of them
+STRATEGIES = {
+    # Hold the top `top` fraction of symbols by return over `lookback` days, skipping the most
+    # recent `skip` days (short-term reversal), re-ranked every `rebalance` days
+    'momentum': {'lookback': 126, 'skip': 21, 'rebalance': 21, 'top': 0.2, 'cost_bps': 5.0},
+    # Buy a symbol that closes `entry_z` standard deviations below its `window`-day mean while above
+    # its `trend_window`-day mean; sell when it gets back to the mean or after `max_hold` days
+    'swing': {'window': 20, 'entry_z': 2.0, 'exit_z': 0.0, 'max_hold': 10, 'trend_window': 100,
+              'max_positions': 10, 'cost_bps': 5.0},
+}
+
+# Parameter -> (minimum, maximum or None); anything else out of range could look ahead or break the arrays
+PARAM_BOUNDS = {
+    'lookback': (1, None),
+    'skip': (0, None),
+    'rebalance': (1, None),
+    'top': (0.01, 1.0),
+    'window': (2, None),
+    'entry_z': (0.0, None),
+    'max_hold': (1, None),
+    'trend_window': (0, None),  # 0 turns the trend filter off
+    'max_positions': (1, None),
+    'cost_bps': (0.0, None),
+}
+
+
+def daily_returns(closes):
+    """Close-to-close returns, 0 where either close is missing"""
+    import numpy as np
+
+    returns = np.zeros_like(closes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = closes[1:] / closes[:-1] - 1
+    returns[~np.isfinite(returns)] = 0
+    return returns
+
+
+def momentum_weights(closes, lookback, skip, rebalance, top):
+    """Target weights per day: equal weight in the top momentum names, held between rebalances"""
+    import numpy as np
+
+    days, n = closes.shape
+    weights = np.zeros_like(closes)
+    warmup = int(lookback) + int(skip)
+    rebalance_days = np.arange(warmup, days, max(int(rebalance), 1))
+    if not len(rebalance_days):
+        return weights
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = closes[rebalance_days - skip] / closes[rebalance_days - skip - lookback] - 1
+    # Only rank symbols that trade on the rebalance day
+    score[~np.isfinite(score) | ~np.isfinite(closes[rebalance_days])] = np.nan
+    valid = np.isfinite(score)
+    ranks = np.argsort(np.argsort(np.where(valid, -score, np.inf), axis=1), axis=1)
+    picks = valid.sum(axis=1, keepdims=True)
+    chosen = valid & (ranks < np.ceil(picks * top))
+    targets = chosen / np.maximum(chosen.sum(axis=1, keepdims=True), 1)
+
+    # Forward-fill each rebalance's targets until the next one
+    last = np.full(days, -1)
+    last[rebalance_days] = np.arange(len(rebalance_days))
+    last = np.maximum.accumulate(last)
+    weights[last >= 0] = targets[last[last >= 0]]
+    return weights
+
+
+def swing_weights(closes, window, entry_z, exit_z, max_hold, trend_window, max_positions):
+    """Target weights per day plus the return of every completed trade.
+
+    Entries and exits depend on whether a position is already open, so this steps through days,
+    but each step is a vector operation over the whole universe. At most `max_positions` are open
+    at once, each sized 1/max_positions; when more symbols qualify, the most oversold are bought.
+    """
+    import numpy as np
+
+    days, n = closes.shape
+    mean, std = rolling_mean_std(closes, int(window))
+    trend, _ = rolling_mean_std(closes, int(trend_window)) if trend_window else (np.full_like(closes, -np.inf), None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (closes - mean) / std
+    enter = (z <= -entry_z) & (closes > trend)
+    leave = z >= exit_z
+
+    held = np.zeros((days, n), dtype=bool)
+    open_ = np.zeros(n, dtype=bool)
+    age = np.zeros(n, dtype=int)
+    entry_price = np.full(n, np.nan)
+    trades = []
+    for t in range(days):
+        price = closes[t]
+        exits = open_ & (leave[t] | (age >= max_hold)) & np.isfinite(price)
+        if exits.any():
+            trades.append(price[exits] / entry_price[exits] - 1)
+            open_ &= ~exits
+        entries = ~open_ & ~exits & enter[t]
+        slots = max_positions - int(open_.sum())
+        if entries.sum() > slots:
+            candidates = np.flatnonzero(entries)
+            entries[:] = False
+            entries[candidates[np.argsort(z[t, candidates], kind='stable')[:max(slots, 0)]]] = True
+        open_ |= entries
+        entry_price = np.where(entries, price, entry_price)
+        age = np.where(entries, 0, age + open_)
+        held[t] = open_
+
+    weights = held / max_positions
+    return weights, np.concatenate(trades) if trades else np.zeros(0)
+
+
+def performance(returns):
+    """Annualized summary of a daily return series"""
+    import numpy as np
+
+    if not len(returns):
+        return {'totalReturn': 0.0, 'cagr': 0.0, 'volatility': 0.0, 'sharpe': None, 'maxDrawdown': 0.0}
+    equity = np.cumprod(1 + returns)
+    std = returns.std()
+    return {
+        'totalReturn': float(equity[-1] - 1),
+        'cagr': float(equity[-1] ** (TRADING_DAYS / len(returns)) - 1) if equity[-1] > 0 else -1.0,
+        'volatility': float(std * np.sqrt(TRADING_DAYS)),
+        'sharpe': float(returns.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else None,
+        'maxDrawdown': float((equity / np.maximum.accumulate(equity) - 1).min()),
+    }
+
+
+def simulate(closes, weights, cost_bps):
+    """Daily portfolio returns from yesterday's weights, net of costs on traded weight"""
+    import numpy as np
+
+    returns = daily_returns(closes)
+    held = np.vstack([np.zeros((1, closes.shape[1])), weights[:-1]])
+    gross = held * returns
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0)).sum(axis=1)
+    net = gross.sum(axis=1) - turnover * cost_bps / 1e4
+    return net, gross.sum(axis=0), turnover
+
+
+def run_strategy(strategy, dates, symbols, closes, **overrides):
+    """Backtest one strategy over aligned closes (rows = dates, columns = symbols)"""
+    import numpy as np
+
+    if strategy not in STRATEGIES:
+        raise ValueError(f'strategy must be one of {", ".join(STRATEGIES)}')
+    unknown = set(overrides) - set(STRATEGIES[strategy])
+    if unknown:
+        raise ValueError(f'Unknown {strategy} parameters: {", ".join(sorted(unknown))}')
+    params = {}
+    for name, default in STRATEGIES[strategy].items():
+        value = overrides.get(name, default)
+        try:
+            value = type(default)(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} must be {"an integer" if isinstance(default, int) else "a number"}, got {value!r}')
+        low, high = PARAM_BOUNDS.get(name, (None, None))
+        if value != value or (low is not None and value < low) or (high is not None and value > high):
+            bounds = f'between {low} and {high}' if high is not None else f'at least {low}'
+            raise ValueError(f'{name} must be {bounds}, got {value}')
+        params[name] = value
+
+    trades = None
+    settings = {k: v for k, v in params.items() if k != 'cost_bps'}
+    if strategy == 'momentum':
+        weights = momentum_weights(closes, **settings)
+    else:
+        weights, trades = swing_weights(closes, **settings)
+    net, contribution, turnover = simulate(closes, weights, params['cost_bps'])
+
+    # Equal weight in everything trading that day, rebalanced daily, for comparison
+    returns = daily_returns(closes)
+    trading = np.isfinite(closes)
+    trading[1:] &= trading[:-1]
+    benchmark = (returns * trading).sum(axis=1) / np.maximum(trading.sum(axis=1), 1)
+
+    equity = np.cumprod(1 + net)
+    step = max(len(equity) // MAX_CURVE_POINTS, 1)
+    top = np.argsort(-contribution)[:10]
+    result = {
+        'strategy': strategy,
+        'params': params,
+        'symbols': len(symbols),
+        'start': str(dates[0])[:10] if len(dates) else None,
+        'end': str(dates[-1])[:10] if len(dates) else None,
+        'days': len(dates),
+        'stats': dict(performance(net), exposure=float(weights.sum(axis=1).mean()) if len(net) else 0.0,
+                      turnover=float(turnover.sum() / max(len(net), 1) * TRADING_DAYS)),
+        'benchmark': performance(benchmark),
+        'topContributors': [{'symbol': symbols[i], 'contribution': float(contribution[i])}
+                            for i in top if contribution[i] > 0],
+        'equity': [{'date': str(dates[i])[:10], 'value': float(equity[i])} for i in range(0, len(equity), step)],
+    }
+    if trades is not None:
+        result['trades'] = {
+            'count': int(len(trades)),
+            'hitRate': float((trades > 0).mean()) if len(trades) else None,
+            'meanReturn': float(trades.mean()) if len(trades) else None,
+        }
+    return result
+
+
+class Backtester:
+    """Runs strategies over closes from the bar store, keeping the last matrix loaded until bars change"""
+
+    def __init__(self, bar_store):
+        self.bar_store = bar_store
+        self._lock = threading.Lock()
+        self._key = None
+        self._closes = None
+
+    def closes(self, symbols=None, start=None, end=None):
+        key = (tuple(symbols) if symbols else None, str(start)[:10], str(end)[:10], self.bar_store.version)
+        with self._lock:
+            if key != self._key:
+                frame = self.bar_store.matrix(symbols, start, end)
+                self._closes = (frame.index.to_numpy(), list(frame.columns), frame.to_numpy(dtype=float))
+                self._key = key
+            return self._closes
+
+    def run(self, strategy, symbols=None, start=None, end=None, refresh=False, **params):
+        """Backtest over stored bars; with refresh, first download bars for symbols never fetched"""
+        start = start or (date.today() - timedelta(days=5 * 365)).isoformat()
+        if symbols:
+            symbols = [s.strip().upper() for s in symbols if s.strip()]
+            if refresh:
+                covered = self.bar_store.coverage(symbols)
+                missing = [s for s in symbols if s not in covered]
+                if missing:
+                    self.bar_store.refresh(missing, start=start)
+        dates, columns, closes = self.closes(symbols, start, end)
+        if not columns:
+            raise ValueError('No stored bars for those symbols; fetch them first')
+        return run_strategy(strategy, dates, columns, closes, **params)
+
+
+def main(argv=None):
+    from bar_store import BarStore
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('strategy', choices=list(STRATEGIES))
+    parser.add_argument('--symbols', help='comma-separated; default: every symbol in the bar store')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--bars', default='bars.db')
+    parser.add_argument('--refresh', action='store_true', help='download bars for symbols not yet stored')
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols.split(',') if args.symbols else None
+    result = Backtester(BarStore(args.bars)).run(args.strategy, symbols, args.start, args.end, refresh=args.refresh)
+    print(f"{result['strategy']} over {result['symbols']} symbols, {result['start']} to {result['end']}")
+    for label, stats in (('strategy', result['stats']), ('benchmark', result['benchmark'])):
+        print(f"{label:<10} total {stats['totalReturn']:+.1%}  cagr {stats['cagr']:+.1%}  "
+              f"vol {stats['volatility']:.1%}  max drawdown {stats['maxDrawdown']:.1%}")
+    if 'trades' in result:
+        print(f"{result['trades']['count']} trades, hit rate {result['trades']['hitRate'] or 0:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
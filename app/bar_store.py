@@ -0,0 +1,164 @@
+import logging
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (symbol TEXT PRIMARY KEY, first TEXT, last TEXT, checked TEXT);
+"""
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def split_download(data, symbols):
+    """Turn a yf.download frame (either column layout) into {symbol: OHLCV frame}"""
+    if not hasattr(data.columns, 'levels'):
+        # A single symbol comes back with flat columns
+        return {symbols[0]: data} if len(symbols) == 1 else {}
+    level = 0 if set(symbols) & set(data.columns.get_level_values(0)) else 1
+    return {
+        symbol: data.xs(symbol, axis=1, level=level)
+        for symbol in symbols if symbol in data.columns.get_level_values(level)
+    }
+
+
+class BarStore:
+    """Local store of split/dividend-adjusted daily bars, filled from yfinance in batches.
+
+    refresh() downloads only the dates each symbol is missing, grouping symbols that need the
+    same range into one yf.download call. Readers get long frames (load) or a date x symbol
+    matrix (matrix) straight from SQLite without touching the network.
+    """
+
+    def __init__(self, path='bars.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._writes = 0
+
+    @property
+    def version(self):
+        """Changes whenever this or any other process writes bars, so derived results can be recomputed"""
+        with self._lock:
+            return self._writes, self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def write(self, symbol, bars):
+        """Store an OHLCV frame indexed by date (yfinance column names)"""
+        bars = bars.dropna(subset=['Close'])
+        if bars.empty:
+            return 0
+        dates = [d.strftime('%Y-%m-%d') for d in bars.index]
+        rows = list(zip(
+            [symbol] * len(bars), dates,
+            *(bars[column].astype(float).tolist() for column in ('Open', 'High', 'Low', 'Close', 'Volume'))
+        ))
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._conn.execute(
+                'INSERT INTO coverage (symbol, first, last) VALUES (?, ?, ?) '
+                'ON CONFLICT(symbol) DO UPDATE SET first = min(coalesce(first, excluded.first), excluded.first), '
+                'last = max(coalesce(last, excluded.last), excluded.last)',
+                (symbol, dates[0], dates[-1])
+            )
+            self._writes += 1
+        return len(rows)
+
+    def coverage(self, symbols=None):
+        with self._lock:
+            rows = self._conn.execute('SELECT symbol, first, last, checked FROM coverage').fetchall()
+        wanted = None if symbols is None else set(symbols)
+        return {row[0]: row[1:] for row in rows if wanted is None or row[0] in wanted}
+
+    def _mark_checked(self, symbols, day):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO coverage (symbol, checked) VALUES (?, ?) '
+                'ON CONFLICT(symbol) DO UPDATE SET checked = excluded.checked',
+                [(symbol, day) for symbol in symbols]
+            )
+
+    def refresh(self, symbols, start, end=None, chunk_size=100, download=None):
+        """Download whatever part of [start, end) each symbol is missing; returns bars written"""
+        if download is None:
+            import yfinance as yf
+            download = yf.download
+
+        start = str(start)[:10]
+        end = str(end or date.today() + timedelta(days=1))[:10]
+        coverage = self.coverage(symbols)
+
+        # Group symbols by the first date they need so each group is one batched download
+        pending = {}
+        for symbol in dict.fromkeys(symbols):
+            first, last, checked = coverage.get(symbol, (None, None, None))
+            if first is not None and first <= start:
+                # Start again from the last day fetched, which may have been a partial intraday bar
+                # (`checked` is the exclusive end of the last range requested)
+                since = max(last, (date.fromisoformat(checked) - timedelta(days=1)).isoformat() if checked else last)
+            elif first is None and checked:
+                # Nothing came back last time (delisted or unknown); only ask for newer dates
+                since = checked
+            else:
+                since = start
+            if since < end:
+                pending.setdefault(since, []).append(symbol)
+
+        written = 0
+        for since, group in sorted(pending.items()):
+            for i in range(0, len(group), chunk_size):
+                batch = group[i:i + chunk_size]
+                try:
+                    data = download(batch, start=since, end=end, interval='1d', group_by='ticker',
+                                    auto_adjust=True, threads=True, progress=False)
+                except Exception as e:
+                    logger.error(f"Error downloading bars for {len(batch)} symbols from {since}: {str(e)}")
+                    continue
+                for symbol, bars in split_download(data, batch).items():
+                    written += self.write(symbol, bars)
+                # Remember the range was asked for, so delisted symbols aren't requested again
+                self._mark_checked(batch, end)
+        return written
+
+    def load(self, symbols=None, start=None, end=None, fields=('close',)):
+        """Long frame of symbol, date (datetime64) and the requested fields"""
+        import pandas as pd
+
+        fields = [field for field in fields if field in FIELDS]
+        sql = f"SELECT symbol, date, {', '.join(fields)} FROM bars WHERE 1 = 1"
+        params = []
+        if symbols is not None:
+            symbols = list(dict.fromkeys(symbols))
+            sql += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params += symbols
+        if start is not None:
+            sql += ' AND date >= ?'
+            params.append(str(start)[:10])
+        if end is not None:
+            sql += ' AND date < ?'
+            params.append(str(end)[:10])
+        sql += ' ORDER BY symbol, date'
+
+        with self._lock:
+            frame = pd.read_sql_query(sql, self._conn, params=params)
+        frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d')
+        return frame
+
+    def matrix(self, symbols=None, start=None, end=None, field='close'):
+        """Date x symbol frame of one field, aligned on the union of trading days"""
+        frame = self.load(symbols, start, end, fields=(field,))
+        return frame.pivot(index='date', columns='symbol', values=field).sort_index()
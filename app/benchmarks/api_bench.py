@@ -0,0 +1,163 @@
+"""Load test every Flask route against local upstream stand-ins.
+
+Run from the app directory:
+
+    python -m benchmarks.api_bench --concurrency 16 --requests 200 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks import stubs
+
+# Values substituted into route parameters
+PATH_PARAMS = {'symbol': 'AAPL', 'ticker': 'AAPL', 'order_id': '00000000-0000-0000-0000-000000000000'}
+
+# Query strings and JSON bodies for routes that need them
+REQUEST_OPTIONS = {
+    ('GET', '/api/search'): {'query': 'q=earnings'},
+    ('GET', '/api/stocks/<symbol>/chart'): {'query': 'timeframe=1m'},
+    ('GET', '/api/stocks/<symbol>/indicators'): {'query': 'points=30'},
+    ('POST', '/api/orders'): {'body': {'symbol': 'AAPL', 'side': 'buy', 'qty': 1}},
+    ('POST', '/api/orders/batch'): {'body': {'orders': [
+        {'symbol': symbol, 'side': 'buy', 'notional': 500, 'timeInForce': 'gtc'}
+        for symbol in ('AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL')
+    ]}},
+}
+
+# Operational routes that are not part of the API being measured
+SKIP_BY_DEFAULT = {'/metrics', '/static/<path:filename>'}
+
+
+def discover_routes(flask_app):
+    routes = []
+    for rule in flask_app.url_map.iter_rules():
+        if rule.rule in SKIP_BY_DEFAULT:
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            path = rule.rule
+            for name in rule.arguments:
+                path = re.sub(rf'<(?:\w+:)?{name}>', PATH_PARAMS.get(name, 'X'), path)
+            options = REQUEST_OPTIONS.get((method, rule.rule), {})
+            if options.get('query'):
+                path += '?' + options['query']
+            routes.append({'name': f'{method} {rule.rule}', 'method': method, 'path': path,
+                           'body': options.get('body')})
+    return sorted(routes, key=lambda route: route['name'])
+
+
+def send(base_url, route):
+    data = json.dumps(route['body']).encode() if route['body'] is not None else None
+    req = urllib.request.Request(base_url + route['path'], data=data, method=route['method'],
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def run_route(base_url, route, requests, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: send(base_url, route), range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies = np.array([seconds for _, seconds in results]) * 1000
+    statuses = [status for status, _ in results]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'route': route['name'],
+        'requests': requests,
+        'errors': sum(1 for status in statuses if status == 0 or status >= 500),
+        'statuses': {str(s): statuses.count(s) for s in sorted(set(statuses))},
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'rps': requests / elapsed
+    }
+
+
+def start_server(flask_app):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def print_report(results):
+    header = f"{'route':<48} {'reqs':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['route']:<48} {r['requests']:>6} {r['errors']:>5} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['rps']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='mean simulated upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls that fail')
+    parser.add_argument('--gemini-latency-ms', type=float, default=200.0)
+    parser.add_argument('--routes', default='', help='regex selecting routes by "METHOD /rule"')
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    stubs.configure(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    stubs.configure(latency_ms=args.gemini_latency_ms, upstream='gemini')
+    stubs.install()
+
+    # Keep benchmark state out of the working tree
+    os.environ.setdefault('SEARCH_INDEX_PATH', os.path.join(tempfile.mkdtemp(), 'search_index.db'))
+    os.environ.setdefault('SHARED_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'shared_cache.db'))
+    for key in ('ALPACA_API_KEY', 'ALPACA_API_SECRET', 'FINNHUB_API_KEY', 'GEMINI_API_KEY'):
+        os.environ.setdefault(key, 'benchmark')
+    # The stand-ins have no rate limit; measure our own overhead rather than the order throttle
+    os.environ.setdefault('ALPACA_RATE_LIMIT', '1000000')
+
+    import app as app_module
+
+    flask_app = app_module.create_app(prefetch=False)
+    flask_app.logger.disabled = True
+    app_module.logger.disabled = True
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server, base_url = start_server(flask_app)
+    routes = [r for r in discover_routes(flask_app) if re.search(args.routes, r['name'])]
+    results = []
+    try:
+        for route in routes:
+            send(base_url, route)  # warm up caches and lazy imports
+            results.append(run_route(base_url, route, args.requests, args.concurrency))
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Benchmark and evaluate the trade recommender on synthetic data.
+
+Run from the app directory:
+
+    python -m benchmarks.recommender_bench --users 100,1000,5000 --symbols 500 --density 0.02
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from model.evaluate import evaluate_recommender, popularity_baseline, split_holdout
+from model.item_model import build_item_model, recommend_items
+from model.model import compute_user_similarity, prepare_trade_matrix, recommend_stocks_for_user
+from model.synthetic import generate_trades
+
+
+def measure(fn, *args, track_memory=True):
+    """Run fn once for wall time and, optionally, once more under tracemalloc for peak memory"""
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if track_memory:
+        tracemalloc.start()
+        fn(*args)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, seconds, peak_mb
+
+
+def user_cf_recommender(user_similarity_df, train_df):
+    def recommend(user_id, k, seen):
+        # Ask for extra so there are still k left once already-traded symbols are dropped
+        return recommend_stocks_for_user(user_id, user_similarity_df, train_df, top_n=k + len(seen))
+    return recommend
+
+
+def item_recommender(item_model, train_df):
+    trades_by_user = {user_id: group.to_dict('records') for user_id, group in train_df.groupby('user_id')}
+
+    def recommend(user_id, k, seen):
+        return recommend_items(item_model, trades_by_user[user_id], top_n=k)
+    return recommend
+
+
+def run_case(n_users, n_symbols, density, queries, k, eval_users, track_memory, seed):
+    trades_df = generate_trades(n_users=n_users, n_symbols=n_symbols, density=density, seed=seed)
+    train_df, test_df = split_holdout(trades_df, seed=seed)
+
+    trade_matrix, build_s, build_mb = measure(prepare_trade_matrix, train_df, track_memory=track_memory)
+    similarity_df, sim_s, sim_mb = measure(compute_user_similarity, trade_matrix, track_memory=track_memory)
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(trade_matrix.index, size=min(queries, len(trade_matrix)), replace=False)
+    query_ms = []
+    for user_id in sample:
+        start = time.perf_counter()
+        recommend_stocks_for_user(user_id, similarity_df, train_df, top_n=k)
+        query_ms.append((time.perf_counter() - start) * 1000)
+
+    item_model, item_build_s, item_build_mb = measure(build_item_model, train_df, track_memory=track_memory)
+    item_ms = []
+    for user_id in sample:
+        trades_input = train_df[train_df['user_id'] == user_id].to_dict('records')
+        start = time.perf_counter()
+        recommend_items(item_model, trades_input, top_n=k)
+        item_ms.append((time.perf_counter() - start) * 1000)
+
+    quality = evaluate_recommender(user_cf_recommender(similarity_df, train_df), train_df, test_df,
+                                   k=k, max_users=eval_users, seed=seed)
+    item_quality = evaluate_recommender(item_recommender(item_model, train_df), train_df, test_df,
+                                        k=k, max_users=eval_users, seed=seed)
+    baseline = evaluate_recommender(popularity_baseline(train_df), train_df, test_df,
+                                    k=k, max_users=eval_users, seed=seed)
+    return {
+        'users': n_users,
+        'symbols': n_symbols,
+        'density': density,
+        'trades': len(trades_df),
+        'matrix_build_s': build_s,
+        'matrix_build_peak_mb': build_mb,
+        'similarity_s': sim_s,
+        'similarity_peak_mb': sim_mb,
+        'query_p50_ms': float(np.percentile(query_ms, 50)),
+        'query_p95_ms': float(np.percentile(query_ms, 95)),
+        'item_build_s': item_build_s,
+        'item_build_peak_mb': item_build_mb,
+        'item_query_p50_ms': float(np.percentile(item_ms, 50)),
+        'item_query_p95_ms': float(np.percentile(item_ms, 95)),
+        'user_cf': quality,
+        'item_item': item_quality,
+        'popularity': baseline,
+    }
+
+
+def print_report(results):
+    header = (f"{'users':>7} {'symbols':>7} {'trades':>9} {'build s':>8} {'sim s':>8} {'sim MB':>8} "
+              f"{'q p50 ms':>9} {'q p95 ms':>9} {'hit@k':>6} {'prec@k':>7} {'pop hit':>7} "
+              f"{'ii build s':>10} {'ii p50 ms':>9} {'ii hit':>6} {'ii prec':>7}")
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        sim_mb = f"{r['similarity_peak_mb']:.1f}" if r['similarity_peak_mb'] is not None else '-'
+        print(f"{r['users']:>7} {r['symbols']:>7} {r['trades']:>9} {r['matrix_build_s']:>8.3f} "
+              f"{r['similarity_s']:>8.3f} {sim_mb:>8} {r['query_p50_ms']:>9.2f} {r['query_p95_ms']:>9.2f} "
+              f"{r['user_cf']['hit_rate']:>6.3f} {r['user_cf']['precision_at_k']:>7.3f} "
+              f"{r['popularity']['hit_rate']:>7.3f} {r['item_build_s']:>10.3f} {r['item_query_p50_ms']:>9.2f} "
+              f"{r['item_item']['hit_rate']:>6.3f} {r['item_item']['precision_at_k']:>7.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', default='100,1000,5000', help='comma-separated user counts')
+    parser.add_argument('--symbols', default='500', help='comma-separated symbol universe sizes')
+    parser.add_argument('--density', type=float, default=0.02, help='fraction of symbols each user trades')
+    parser.add_argument('--queries', type=int, default=50, help='users timed for per-query latency')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--eval-users', type=int, default=500, help='cap on users scored offline')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_symbols in (int(s) for s in args.symbols.split(',')):
+        for n_users in (int(u) for u in args.users.split(',')):
+            results.append(run_case(n_users, n_symbols, args.density, args.queries, args.k,
+                                    args.eval_users, not args.no_memory, args.seed))
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Measure cold start of the Flask app in fresh interpreters.
+
+Run from the app directory:
+
+    python -m benchmarks.startup_bench --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs inside each child interpreter; prints one JSON line of timings
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app(sync_index=False, prefetch=False)
+created = time.perf_counter()
+response = flask_app.test_client().get(sys.argv[1])
+done = time.perf_counter()
+heavy = [m for m in ('pandas', 'numpy', 'yfinance', 'alpaca_trade_api', 'finnhub', 'google.genai', 'sklearn')
+         if m in sys.modules]
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_response_ms': (done - start) * 1000,
+    'status': response.status_code,
+    'heavy_modules_loaded': heavy,
+}))
+'''
+
+
+def run_once(path, env):
+    out = subprocess.run([sys.executable, '-c', CHILD, path], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/startup', help='route requested as the first response')
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault('SEARCH_INDEX_PATH', os.path.join(tempfile.mkdtemp(), 'search_index.db'))
+    env.setdefault('SHARED_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'shared_cache.db'))
+    for key in ('ALPACA_API_KEY', 'ALPACA_API_SECRET', 'FINNHUB_API_KEY'):
+        env.setdefault(key, 'benchmark')
+
+    runs = [run_once(args.path, env) for _ in range(args.runs)]
+    for key in ('import_ms', 'create_app_ms', 'first_response_ms'):
+        values = [run[key] for run in runs]
+        print(f'{key:<18} median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}')
+    print(f"heavy modules loaded by first response: {runs[-1]['heavy_modules_loaded'] or 'none'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Deterministic local stand-ins for the Alpaca, yfinance, Finnhub and Gemini clients.
+
+Every upstream call sleeps for a configurable latency and can fail at a configurable
+rate, so the Flask API can be load tested on a machine with no network or API keys.
+"""
+import random
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class UpstreamProfile:
+    """Latency (mean +/- jitter, in ms) and error rate of one simulated upstream"""
+
+    def __init__(self, name, latency_ms=20.0, jitter_ms=5.0, error_rate=0.0, seed=0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(f'{name}:{seed}')
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def call(self, operation):
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            fail = self._random.random() < self.error_rate
+            self.calls += 1
+        time.sleep(delay)
+        if fail:
+            raise UpstreamError(f'{self.name}.{operation}: injected failure')
+
+
+def symbol_seed(symbol):
+    return zlib.crc32(symbol.encode())
+
+
+def make_bars(symbol, periods=60, freq='1D', end=None):
+    """Random-walk OHLCV bars that are always the same for a given symbol"""
+    rng = np.random.default_rng(symbol_seed(symbol))
+    end = pd.Timestamp(end or datetime.now()).floor('min')
+    index = pd.date_range(end=end, periods=periods, freq=freq, name='Date')
+    base = 20 + symbol_seed(symbol) % 400
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.015, periods)))
+    open_ = close * (1 + rng.normal(0, 0.005, periods))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, periods)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, periods)))
+    volume = rng.integers(1_000_000, 50_000_000, periods)
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+        'Dividends': 0.0, 'Stock Splits': 0.0
+    }, index=index)
+
+
+PERIOD_BARS = {'1d': 1, '2d': 2, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260}
+INTERVAL_FREQ = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '1h', '1d': '1D'}
+
+
+class StubTicker:
+    profile = UpstreamProfile('yfinance')
+
+    def __init__(self, symbol, session=None):
+        self.ticker = symbol
+
+    @property
+    def info(self):
+        self.profile.call('info')
+        seed = symbol_seed(self.ticker)
+        return {
+            'shortName': f'{self.ticker} Corp',
+            'longBusinessSummary': f'{self.ticker} is a simulated company used for benchmarking.',
+            'industry': 'Software', 'sector': 'Technology',
+            'marketCap': 1e9 + seed % 10**12, 'fullTimeEmployees': seed % 100000,
+            'trailingPE': 10 + seed % 40, 'forwardPE': 9 + seed % 35, 'trailingEps': 1 + seed % 10,
+            'dividendYield': (seed % 400) / 10000, 'beta': 0.5 + (seed % 150) / 100,
+            'fiftyTwoWeekHigh': 200.0, 'fiftyTwoWeekLow': 100.0, 'averageVolume': 10_000_000,
+            'recommendationKey': 'buy', 'targetMeanPrice': 180.0, 'targetHighPrice': 220.0,
+            'targetLowPrice': 140.0, 'averageAnalystRating': '2.0 - Buy', 'profitMargins': 0.2,
+            'revenueGrowth': 0.1, 'earningsGrowth': 0.12, 'trailingAnnualDividendYield': 0.01,
+            'currentPrice': 150.0, 'previousClose': 149.0
+        }
+
+    def history(self, period=None, start=None, end=None, interval='1d', **kwargs):
+        self.profile.call('history')
+        freq = INTERVAL_FREQ.get(interval, '1D')
+        if start is not None:
+            span = pd.Timestamp(end or datetime.now()) - pd.Timestamp(start)
+            periods = max(2, min(2000, int(span / pd.Timedelta(freq))))
+        else:
+            periods = PERIOD_BARS.get(period, 21)
+        return make_bars(self.ticker, periods=periods, freq=freq, end=end)
+
+
+def stub_download(tickers, period='1mo', interval='1d', group_by='column', **kwargs):
+    """Batched download returning a (field, symbol) column MultiIndex like yf.download"""
+    StubTicker.profile.call('download')
+    if isinstance(tickers, str):
+        tickers = tickers.replace(',', ' ').split()
+    if kwargs.get('start'):
+        # Business-day bars over [start, end), like a date-ranged download
+        end = pd.Timestamp(kwargs.get('end') or datetime.now()) - pd.Timedelta(days=1)
+        days = pd.bdate_range(kwargs['start'], end)
+        frames = {symbol: make_bars(symbol, periods=len(days), freq='B', end=end) for symbol in tickers}
+    else:
+        frames = {symbol: make_bars(symbol, periods=PERIOD_BARS.get(period, 21)) for symbol in tickers}
+    data = pd.concat(frames, axis=1)
+    return data if group_by == 'ticker' else data.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+def entity(**fields):
+    return SimpleNamespace(**fields)
+
+
+class StubREST:
+    profile = UpstreamProfile('alpaca')
+    symbols = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL']
+
+    def __init__(self, *args, **kwargs):
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def get_account(self):
+        self.profile.call('get_account')
+        return entity(cash='25000.00', portfolio_value='100000.00', buying_power='50000.00',
+                      equity='100000.00', daytrade_count='0', initial_margin='0',
+                      maintenance_margin='0', status='ACTIVE')
+
+    def get_clock(self):
+        self.profile.call('get_clock')
+        now = datetime.now().astimezone()
+        return entity(is_open=True, timestamp=now,
+                      next_open=now + timedelta(hours=18), next_close=now + timedelta(hours=3))
+
+    def list_positions(self):
+        self.profile.call('list_positions')
+        return [entity(
+            symbol=symbol, qty='10', avg_entry_price='100', market_value=str(1000 + i * 100),
+            cost_basis='1000', unrealized_pl=str(i * 100), unrealized_plpc=str(i / 10),
+            current_price=str(100 + i * 10), change_today='0.01', side='long'
+        ) for i, symbol in enumerate(self.symbols)]
+
+    def _order(self, symbol, qty=None, notional=None, side='buy', type='market', time_in_force='day',
+               limit_price=None, stop_price=None):
+        now = pd.Timestamp.now(tz='UTC')
+        return entity(
+            id=str(uuid.UUID(int=symbol_seed(f'{symbol}{now.value}'))), client_order_id=str(uuid.uuid4()),
+            symbol=symbol, qty=qty, notional=notional, filled_qty='0', side=side, type=type,
+            time_in_force=time_in_force, status='accepted', limit_price=limit_price, stop_price=stop_price,
+            submitted_at=now, created_at=now, updated_at=now, filled_at=None, filled_avg_price=None,
+            order_class=''
+        )
+
+    def list_orders(self, status=None, limit=50, nested=False, **kwargs):
+        self.profile.call('list_orders')
+        return [self._order(symbol, qty='1', side='buy' if i % 3 else 'sell')
+                for i, symbol in enumerate((self.symbols * 20)[:limit])]
+
+    def submit_order(self, symbol, qty=None, side='buy', type='market', time_in_force='day',
+                     limit_price=None, stop_price=None, notional=None, **kwargs):
+        self.profile.call('submit_order')
+        order = self._order(symbol, qty, notional, side, type, time_in_force, limit_price, stop_price)
+        with self._lock:
+            self._orders[order.id] = order
+        return order
+
+    def cancel_order(self, order_id):
+        self.profile.call('cancel_order')
+
+    def close_position(self, symbol, qty=None):
+        self.profile.call('close_position')
+        return self._order(symbol, qty='10', side='sell')
+
+    def close_all_positions(self):
+        self.profile.call('close_all_positions')
+        return []
+
+    def get_latest_trade(self, symbol):
+        self.profile.call('get_latest_trade')
+        return entity(symbol=symbol, price=float(make_bars(symbol, periods=2)['Close'].iloc[-1]))
+
+    def get_latest_trades(self, symbols):
+        self.profile.call('get_latest_trades')
+        return {symbol: entity(symbol=symbol, price=float(make_bars(symbol, periods=2)['Close'].iloc[-1]))
+                for symbol in symbols}
+
+    def get_portfolio_history(self, timeframe='1D', date_start=None, date_end=None, **kwargs):
+        self.profile.call('get_portfolio_history')
+        bars = make_bars('PORTFOLIO', periods=90)
+        equity = (bars['Close'] * 500).round(2).tolist()
+        return entity(
+            timestamp=[int(ts.timestamp()) for ts in bars.index],
+            equity=equity,
+            profit_loss=[round(e - equity[0], 2) for e in equity],
+            profit_loss_pct=[round((e - equity[0]) / equity[0], 4) for e in equity]
+        )
+
+
+class StubFinnhub:
+    profile = UpstreamProfile('finnhub')
+
+    def __init__(self, api_key=None):
+        pass
+
+    def company_news(self, symbol, _from=None, to=None):
+        self.profile.call('company_news')
+        now = int(time.time())
+        seed = symbol_seed(symbol)
+        return [{
+            'id': seed % 10**6 * 100 + i,
+            'category': 'company',
+            'datetime': now - i * 3600,
+            'headline': f'{symbol} headline {i}',
+            'summary': f'Simulated news item {i} about {symbol} earnings and guidance.',
+            'related': symbol,
+            'source': 'stub',
+            'url': f'https://example.com/{symbol}/{i}',
+            'image': ''
+        } for i in range(20)]
+
+
+class StubGenaiClient:
+    profile = UpstreamProfile('gemini', latency_ms=200, jitter_ms=50)
+
+    def __init__(self, api_key=None, **kwargs):
+        self.models = self
+
+    def generate_content(self, model=None, contents=None, **kwargs):
+        self.profile.call('generate_content')
+        text = 'Simulated model response.'
+        part = SimpleNamespace(text=text)
+        return SimpleNamespace(text=text, candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+PROFILES = {
+    'alpaca': StubREST.profile,
+    'yfinance': StubTicker.profile,
+    'finnhub': StubFinnhub.profile,
+    'gemini': StubGenaiClient.profile,
+}
+
+
+def configure(latency_ms=None, jitter_ms=None, error_rate=None, upstream=None):
+    """Adjust latency/error injection for one upstream, or all of them"""
+    for name, profile in PROFILES.items():
+        if upstream and name != upstream:
+            continue
+        if latency_ms is not None:
+            profile.latency_ms = latency_ms
+        if jitter_ms is not None:
+            profile.jitter_ms = jitter_ms
+        if error_rate is not None:
+            profile.error_rate = error_rate
+
+
+def install():
+    """Swap the real client classes for the stand-ins; must run before `app` is imported"""
+    import alpaca_trade_api
+    import finnhub
+    import yfinance
+    from google import genai
+
+    alpaca_trade_api.REST = StubREST
+    yfinance.Ticker = StubTicker
+    yfinance.download = stub_download
+    finnhub.Client = StubFinnhub
+    genai.Client = StubGenaiClient
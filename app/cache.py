@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and, optionally, total byte size and entry age"""
+
+    def __init__(self, max_entries=128, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._expires = {}
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            if self.ttl is not None and self._expires[key] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value, size=0):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            self._evict()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        self._bytes -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+        return self._data.pop(key)
+
+    def _evict(self):
+        # Oldest entries sit at the front of the OrderedDict
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._data)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,5 +1,7 @@
+import io
 import os
 import re
+import zlib
 import streamlit as st
 from dotenv import load_dotenv
 from google import genai
@@ -7,6 +9,12 @@ import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from cache import LRUCache
+from search_index import SearchIndex
+from bar_store import BarStore
+from backtest import Backtester
+from indicators import IndicatorState
+from screener import Screener, default_universe, parse_screen_query
 
 # -----------------------
 # 1) Trading Strategies
@@ -72,16 +80,41 @@ def generate_stock_summary(ticker):
     except Exception:
         return "Invalid Ticker"
 
-def plot_stock_chart(ticker, period="6mo"):
-    data = get_stock_data(ticker, period)
-    if not data["valid"]:
-        return None
-    hist = data["history"]
+@st.cache_resource
+def get_chart_cache():
+    """Rendered chart bytes shared across Streamlit reruns and sessions"""
+    return LRUCache(max_entries=64, max_bytes=32 * 1024 * 1024)
+
+def render_chart_bytes(hist, ticker, period, fmt="png"):
     fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(hist.index, hist['Close'])
-    ax.set(title=f"{ticker} Stock Price - {period}", xlabel="Date", ylabel="Price ($)")
-    ax.grid(True)
-    return fig
+    try:
+        ax.plot(hist.index, hist['Close'])
+        ax.set(title=f"{ticker} Stock Price - {period}", xlabel="Date", ylabel="Price ($)")
+        ax.grid(True)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=100, bbox_inches="tight")
+    finally:
+        # pyplot keeps every figure alive until it is closed explicitly
+        plt.close(fig)
+    data = buf.getvalue()
+    # PNG is already compressed, SVG text is not
+    return zlib.compress(data) if fmt == "svg" else data
+
+def plot_stock_chart(ticker, period="6mo", fmt="png"):
+    """Return the chart as PNG/SVG bytes, reusing the cached render until a new bar arrives"""
+    try:
+        hist = yf.Ticker(ticker).history(period=period)
+    except Exception:
+        return None
+    if hist.empty:
+        return None
+    cache = get_chart_cache()
+    key = (ticker, period, str(hist.index[-1]), fmt)
+    data = cache.get(key)
+    if data is None:
+        data = render_chart_bytes(hist, ticker, period, fmt)
+        cache.set(key, data, size=len(data))
+    return zlib.decompress(data) if fmt == "svg" else data
 
 def analyze_trend(ticker, days=30):
     data = get_stock_data(ticker, period=f"{days}d")
@@ -92,6 +125,114 @@ def analyze_trend(ticker, days=30):
     trend = "strongly bullish" if change > 5 else "mildly bullish" if change > 0 else "mildly bearish" if change > -5 else "strongly bearish"
     return f"{days}-day trend for {ticker}: {trend} ({change:.2f}%)."
 
+def describe_indicators(ticker):
+    """Plain-language reading of RSI, MACD, Bollinger bands and moving averages over the last year"""
+    data = get_stock_data(ticker, period="1y")
+    if not data["valid"] or data["history"].empty:
+        return f"Not enough data to compute indicators for {ticker}."
+    closes = data["history"]["Close"].dropna().to_numpy()
+    v = IndicatorState.from_closes(closes).values()
+    lines = [f"Technical indicators for {ticker} (close ${v['close']:.2f}):"]
+    if v["rsi14"] is not None:
+        zone = "overbought" if v["rsi14"] > 70 else "oversold" if v["rsi14"] < 30 else "neutral"
+        lines.append(f"- RSI(14): {v['rsi14']:.1f} ({zone})")
+    if v["macd"] is not None:
+        side = "above" if v["macdHist"] > 0 else "below"
+        lines.append(f"- MACD(12,26,9): {v['macd']:.2f}, {side} its signal line ({v['macdSignal']:.2f})")
+    if v["bbUpper"] is not None:
+        lines.append(f"- Bollinger(20, 2): ${v['bbLower']:.2f} - ${v['bbUpper']:.2f}")
+    for window in (20, 50):
+        if v[f"sma{window}"] is not None:
+            side = "above" if v["close"] > v[f"sma{window}"] else "below"
+            lines.append(f"- Price is {side} its {window}-day average (${v[f'sma{window}']:.2f})")
+    return "\n".join(lines)
+
+SEARCH_STOPWORDS = {"search", "find", "news", "about", "for", "on", "the", "any", "me", "show", "what", "is", "are", "latest", "recent", "congress", "trades"}
+
+@st.cache_resource
+def get_search_index():
+    return SearchIndex(os.getenv("SEARCH_INDEX_PATH", "search_index.db"))
+
+def search_local_index(query, ticker=None, limit=5):
+    text = re.sub(r'\$[A-Za-z]+|\bticker:[A-Za-z]+\b', ' ', query)
+    terms = [w for w in re.findall(r"\w+", text) if w.lower() not in SEARCH_STOPWORDS]
+    kind = "congress" if "congress" in query.lower() else None
+    results = get_search_index().search(" ".join(terms), symbol=ticker, kind=kind, limit=limit)
+    if not results:
+        return "No matching news or congressional trades in the local index."
+    lines = ["Local news and congressional trade matches:"]
+    for r in results:
+        date = datetime.fromtimestamp(r["published"]).strftime("%Y-%m-%d") if r["published"] else "n/a"
+        lines.append(f"- [{r['kind']}] {r['symbol']} ({date}): {r['title']} - {r['snippet']}")
+    return "\n".join(lines)
+
+@st.cache_resource
+def get_bar_store():
+    return BarStore(os.getenv("BAR_STORE_PATH", "bars.db"))
+
+@st.cache_resource
+def get_backtester():
+    return Backtester(get_bar_store())
+
+@st.cache_resource
+def get_screener():
+    return Screener(get_bar_store())
+
+@st.cache_data(ttl=900)
+def refresh_screener_bars(symbols):
+    """Batched download of the universe's missing bars, at most every 15 minutes"""
+    return get_screener().refresh(list(symbols))
+
+def screen_stocks(query, tickers):
+    """Rank the universe (or the named tickers) by the filters a question like "strongly bullish stocks this month" implies"""
+    filters, days, sort, ascending = parse_screen_query(query)
+    try:
+        symbols = tickers or default_universe(os.getenv("SCREENER_UNIVERSE_PATH", "universe.csv"))
+    except Exception as e:
+        return f"Could not load the stock universe to screen (add universe.csv or all_transactions.csv): {e}"
+    try:
+        refresh_screener_bars(tuple(symbols))
+    except Exception:
+        pass  # screen whatever bars are already stored
+    try:
+        result = get_screener().run(symbols, days=days, sort=sort, ascending=ascending, limit=10, **filters)
+    except Exception as e:
+        return f"Could not run the screen: {e}"
+    if not result["results"]:
+        return f"None of the {result['screened']} screened stocks match."
+    lines = [f"**{result['matches']} of {result['screened']} stocks match** ({days}-day change, as of {result['asOf']}):"]
+    for row in result["results"]:
+        lines.append(f"- {row['symbol']}: {row['return']:+.1%} ({(row['trend'] or 'n/a').replace('_', ' ')}), "
+                     f"volatility {row['volatility'] or 0:.0%}, {row['fromHigh'] or 0:+.1%} from its 52-week high")
+    lines.append("\nScreened from daily bars; not financial advice.")
+    return "\n".join(lines)
+
+def backtest_strategy(query, tickers):
+    """Backtest momentum or swing trading over the named tickers (or every stored symbol)"""
+    strategy = "swing" if "swing" in query.lower() else "momentum"
+    match = re.search(r"(\d+)\s*years?", query, re.IGNORECASE)
+    years = int(match.group(1)) if match else 5
+    start = (datetime.now() - timedelta(days=365 * years)).strftime("%Y-%m-%d")
+    try:
+        result = get_backtester().run(strategy, tickers or None, start=start, refresh=True)
+    except Exception as e:
+        return f"Could not run the {strategy} backtest: {e}"
+    stats, bench = result["stats"], result["benchmark"]
+    lines = [
+        f"**{strategy.title()} Trading backtest** over {result['symbols']} symbols, {result['start']} to {result['end']}",
+        f"- Strategy: {stats['totalReturn']:+.1%} total, {stats['cagr']:+.1%} a year, "
+        f"max drawdown {stats['maxDrawdown']:.1%}, Sharpe {stats['sharpe'] or 0:.2f}",
+        f"- Equal-weight benchmark: {bench['totalReturn']:+.1%} total, {bench['cagr']:+.1%} a year, "
+        f"max drawdown {bench['maxDrawdown']:.1%}",
+    ]
+    if result.get("trades") and result["trades"]["count"]:
+        trades = result["trades"]
+        lines.append(f"- {trades['count']} trades, {trades['hitRate']:.0%} winners, {trades['meanReturn']:+.2%} average")
+    if result["topContributors"]:
+        lines.append("- Top contributors: " + ", ".join(c["symbol"] for c in result["topContributors"][:5]))
+    lines.append("\nPast performance on historical data, before taxes and slippage; not financial advice.")
+    return "\n".join(lines)
+
 def get_stock_recommendation_key(ticker):
     data = get_stock_data(ticker)
     if not data["valid"]:
@@ -102,6 +243,14 @@ def process_query(query):
     query_lower = query.lower()
     ticker_match = re.search(r'\$([A-Za-z]+)|\bticker:([A-Za-z]+)\b', query)
 
+    if "screen" in query_lower or re.search(r"\bwhich\b.*\b(stocks|companies|tickers|names)\b", query_lower):
+        tickers = [(a or b).upper() for a, b in re.findall(r'\$([A-Za-z]+)|\bticker:([A-Za-z]+)\b', query)]
+        return screen_stocks(query, tickers), "screener_displayed"
+
+    if "backtest" in query_lower or ("perform" in query_lower and ("momentum" in query_lower or "swing" in query_lower)):
+        tickers = [(a or b).upper() for a, b in re.findall(r'\$([A-Za-z]+)|\bticker:([A-Za-z]+)\b', query)]
+        return backtest_strategy(query, tickers), "backtest_displayed"
+
     if "strategy" in query_lower:
         risk = parse_risk_level(query)
         summary_info = generate_stock_summary(ticker) if ticker_match else ""
@@ -109,6 +258,10 @@ def process_query(query):
 
     summary_info = ''
     additional_info = ""
+    if "news" in query_lower or "search" in query_lower:
+        search_ticker = (ticker_match.group(1) or ticker_match.group(2)).upper() if ticker_match else None
+        additional_info += "\n" + search_local_index(query, search_ticker)
+
     if ticker_match:
         ticker = (ticker_match.group(1) or ticker_match.group(2)).upper()
 
@@ -132,11 +285,13 @@ def process_query(query):
             st.subheader(f"{ticker} Stock Chart ({period})")
             chart = plot_stock_chart(ticker, period)
             if chart:
-                st.pyplot(chart)
+                st.image(chart, use_column_width=True)
             return f"Generated chart for {ticker} over {period}.", "chart_displayed"
 
         if "trend" in query_lower or "analysis" in query_lower:
-            additional_info += "\n" + analyze_trend(ticker) + "\n" + summary_info
+            additional_info += "\n" + analyze_trend(ticker) + "\n" + describe_indicators(ticker) + "\n" + summary_info
+        elif any(word in query_lower for word in ("indicator", "rsi", "macd", "bollinger", "moving average")):
+            additional_info += "\n" + describe_indicators(ticker)
 
         summary = generate_stock_summary(ticker)
         additional_info += "\n" + summary
@@ -165,14 +320,20 @@ Keywords
 - "price" for stock prices | $TICKER required for stock-specific prices
 - "chart" or "graph" for stock charts | $TICKER required for stock-specific charts
 - "trend" or "analysis" for trend analysis | $TICKER required for stock-specific analysis
+- "indicators", "RSI", "MACD" or "Bollinger" for technical indicators | $TICKER required
 - "recommendation" or "rating" for stock recommendations | $TICKER required for stock-specific recommendations
+- "news" or "search" to search saved news and congressional trades | $TICKER optional to filter by stock
 - "strategy" for trading strategies | "low", "moderate", or "high" risk levels available | $TICKER optional for stock-specific strategies
+- "screen" or "which stocks..." to filter hundreds of stocks by trend, volatility, volume and 52-week range
+- "backtest" with "momentum" or "swing" to see how a strategy would have done | $TICKERs optional, defaults to every stored symbol
 
 Examples:
 - "$AAPL chart for 3 months"
 - "Tell me about $TSLA and $TSLA Price"
 - "What are some moderate risk strategies? for $AAPL"
 - "What's the recommendation for $TSLA?"
+- "Backtest swing trading on $AAPL $MSFT $NVDA over 3 years"
+- "Which stocks are strongly bullish this month near their 52-week high?"
 """)
 
 if "messages" not in st.session_state:
@@ -194,7 +355,7 @@ if user_input:
         bot_reply = "⚠️ API Key is missing. Please set up your GEMINI_API_KEY in the .env file."
     else:
         prompt, tag = process_query(user_input)
-        if tag in ("chart_displayed", "strategy_suggestions"):
+        if tag in ("chart_displayed", "strategy_suggestions", "backtest_displayed", "screener_displayed"):
             bot_reply = prompt
         else:
             try:
@@ -215,7 +376,10 @@ with st.sidebar:
     - Customizable chart periods (e.g., 3 days, 2 months)
     - Company info and trend analysis
     - Trading strategy recommendations by risk level
+    - Momentum and swing strategy backtests
+    - Stock screening by trend, volatility, volume and 52-week range
     - Yahoo Finance recommendations with LLM justification
+    - Search over saved news and congressional trades
     """)
     st.header("Popular Stocks")
     for ticker in ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA"]:
@@ -0,0 +1,137 @@
+"""Circuit breakers for upstream APIs (yfinance, Finnhub, Alpaca), one per upstream per process.
+
+A breaker opens after BREAKER_FAILURES consecutive failures and then rejects calls with
+CircuitOpenError for BREAKER_RESET_SECONDS, so requests fail fast (a 503 with Retry-After) or
+serve cached data instead of piling up behind a dead upstream. Calls given a timeout run on
+`call_pool` and raise UpstreamTimeout when it passes. `guard` wraps a whole client.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from proxy import CallProxy
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURES', '5'))
+RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_SECONDS', '30'))
+
+# Calls made with a timeout run here so a hung upstream holds one of these threads, not a request thread
+call_pool = ThreadPoolExecutor(max_workers=int(os.getenv('UPSTREAM_POOL_SIZE', '32')), thread_name_prefix='upstream')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that has been failing"""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f'{upstream} is unavailable; retrying in {retry_after:.0f}s')
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class UpstreamTimeout(Exception):
+    """The upstream did not answer in time; `future` still completes in the background"""
+
+    def __init__(self, upstream, timeout, future):
+        super().__init__(f'{upstream} did not respond within {timeout:g}s')
+        self.upstream = upstream
+        self.future = future
+
+
+def is_client_error(error):
+    """HTTP 4xx other than 429 means the upstream is up and rejected this request (bad symbol, no buying power)"""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+
+class CircuitBreaker:
+    """Fails fast once an upstream has failed `failure_threshold` times in a row.
+
+    After `reset_timeout` seconds one trial call is let through (half-open): success closes the
+    circuit again, failure reopens it for another `reset_timeout`.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.trips = 0
+
+    def _before(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining <= 0:
+                # This caller is the trial; if it hangs, another gets a turn after reset_timeout
+                self.state = HALF_OPEN
+                self.opened_at = time.monotonic()
+                return
+            self.rejected += 1
+        raise CircuitOpenError(self.name, max(remaining, 1))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, timeout=None):
+        """fn() unless the circuit is open; with a timeout, stop waiting after that many seconds"""
+        self._before()
+        try:
+            if timeout is None:
+                result = fn()
+            else:
+                future = call_pool.submit(fn)
+                try:
+                    result = future.result(timeout=timeout)
+                except FutureTimeout:
+                    raise UpstreamTimeout(self.name, timeout, future) from None
+        except Exception as e:
+            if is_client_error(e):
+                self.record_success()
+            else:
+                self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            retry_after = None
+            if self.state == OPEN:
+                retry_after = max(self.opened_at + self.reset_timeout - time.monotonic(), 0)
+            return {'state': self.state, 'failures': self.failures, 'retryAfter': retry_after,
+                    'rejected': self.rejected, 'trips': self.trips}
+
+
+breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream):
+    with _breakers_lock:
+        if upstream not in breakers:
+            breakers[upstream] = CircuitBreaker(upstream)
+        return breakers[upstream]
+
+
+def guard(target, upstream):
+    """Proxy that sends every upstream call on a client through the upstream's circuit breaker"""
+    breaker = get_breaker(upstream)
+    return CallProxy(target, lambda name, fn: breaker.call(fn))
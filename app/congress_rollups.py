@@ -0,0 +1,128 @@
+import threading
+
+SYMBOL_PATTERN = r'^[A-Z0-9][A-Z0-9.-]{0,9}$'
+MEASURES = ['trades', 'buys', 'sells', 'volume']
+COUNT_TYPES = {'trades': 'int64', 'buys': 'int64', 'sells': 'int64'}
+
+# Rollup name -> group keys
+TABLES = {
+    'tickers': ['ticker'],
+    'members': ['representative', 'party', 'state'],
+    'months': ['month'],
+    'sectors': ['sector'],
+}
+
+
+def prepare_rows(df):
+    """Normalize raw congress CSV rows into group keys plus additive measures"""
+    import pandas as pd
+
+    tickers = df['ticker'].astype(str).str.strip().str.upper()
+    kind = df['type'].astype(str).str.lower()
+
+    # Amounts are disclosed as ranges ("$1,001 - $15,000", "$1,000,000 +"); use the midpoint
+    bounds = df['amount'].astype(str).str.replace(r'[$,]', '', regex=True).str.extract(r'(\d+)\D*(\d*)')
+    low = pd.to_numeric(bounds[0], errors='coerce')
+    high = pd.to_numeric(bounds[1], errors='coerce').fillna(low)
+    dates = pd.to_datetime(df['transaction_date'], errors='coerce')
+
+    return pd.DataFrame({
+        'ticker': tickers.where(tickers.str.match(SYMBOL_PATTERN)),
+        'representative': df['representative'].fillna(''),
+        'party': df['party'].fillna(''),
+        'state': df['state'].fillna(''),
+        'month': dates.dt.strftime('%Y-%m'),
+        'sector': df['sector'].fillna('Unknown'),
+        'trades': 1,
+        'buys': kind.eq('purchase').astype('int64'),
+        'sells': kind.str.startswith('sale').astype('int64'),
+        'volume': ((low + high) / 2).fillna(0),
+    }, index=df.index)
+
+
+class CongressRollups:
+    """Summary tables over the congress transactions, folded forward as rows are appended.
+
+    sync(df) only aggregates rows past the ones already ingested, the same append-only
+    assumption SearchIndex makes about the CSV, and rebuilds if earlier rows changed. Each
+    sort order is computed once per update so a query is a slice of an already sorted table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables = {}
+        self.rows = 0
+        self._last_row = None
+        self._sorted = {}
+
+    def _aggregate(self, frame):
+        return {
+            name: frame.dropna(subset=[keys[0]]).groupby(keys)[MEASURES].sum()
+            for name, keys in TABLES.items()
+        }
+
+    def sync(self, df):
+        """Fold rows of `df` not yet seen into the rollups; returns the number of new rows"""
+        with self._lock:
+            if self.rows and (len(df) < self.rows or self._row_key(df, self.rows - 1) != self._last_row):
+                # The file was rewritten rather than appended to
+                self.tables, self.rows = {}, 0
+            if len(df) == self.rows:
+                return 0
+
+            partial = self._aggregate(prepare_rows(df.iloc[self.rows:]))
+            for name, table in partial.items():
+                current = self.tables.get(name)
+                if current is not None:
+                    # New keys come back as floats from the outer join
+                    table = current.add(table, fill_value=0).astype(COUNT_TYPES)
+                self.tables[name] = table
+
+            added = len(df) - self.rows
+            self.rows = len(df)
+            self._last_row = self._row_key(df, self.rows - 1)
+            self._sorted = {}
+            return added
+
+    @staticmethod
+    def _row_key(df, position):
+        return tuple(str(v) for v in df.iloc[position].tolist())
+
+    def _sorted_table(self, name, by, ascending):
+        key = (name, by, ascending)
+        table = self._sorted.get(key)
+        if table is None:
+            table = self.tables[name].reset_index()
+            sides = table['buys'] + table['sells']
+            table['buy_ratio'] = (table['buys'] / sides.where(sides > 0)).round(4)
+            table = table.sort_values(by, ascending=ascending, kind='stable', ignore_index=True)
+            self._sorted[key] = table
+        return table
+
+    def query(self, name, by=None, ascending=None, limit=20, offset=0):
+        """Rows of one rollup ordered by a measure or key column"""
+        if name not in TABLES:
+            raise KeyError(f'Unknown rollup: {name}')
+        # Months read naturally in date order; everything else by volume of trades
+        by = by or ('month' if name == 'months' else 'trades')
+        if ascending is None:
+            ascending = by in TABLES[name]
+        columns = TABLES[name] + MEASURES + ['buy_ratio']
+        if by not in columns:
+            raise ValueError(f'Cannot sort {name} by {by}; expected one of {", ".join(columns)}')
+
+        with self._lock:
+            if name not in self.tables:
+                return {'rows': [], 'total': 0}
+            table = self._sorted_table(name, by, ascending)
+        page = table.iloc[offset:offset + limit]
+        return {'rows': page.astype(object).where(page.notna(), None).to_dict('records'), 'total': len(table)}
+
+    def summary(self):
+        with self._lock:
+            totals = self.tables['sectors'][MEASURES].sum() if 'sectors' in self.tables else None
+            return {
+                'rows': self.rows,
+                'tables': {name: len(table) for name, table in self.tables.items()},
+                'totals': {k: float(v) for k, v in totals.items()} if totals is not None else {}
+            }
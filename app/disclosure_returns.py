@@ -0,0 +1,196 @@
+"""How congress-disclosed tickers moved 1, 5, 30 and 90 days after each trade.
+
+Fill the local bar store for every ticker in the dataset, then print the best members:
+
+    python disclosure_returns.py --refresh
+"""
+import argparse
+import sys
+import threading
+
+HORIZONS = (1, 5, 30, 90)
+SYMBOL_PATTERN = r'^[A-Z0-9][A-Z0-9.-]{0,9}$'
+
+# How far past an anchor date the next bar may be (weekends, holidays, halts)
+TOLERANCE_DAYS = 5
+
+# Symbol code and day number packed into one sortable int64
+KEY_SPAN = 1 << 32
+
+
+def prepare_events(trades_df, anchor='disclosure'):
+    """One row per buy/sell with a usable ticker and anchor date, keyed by the CSV row"""
+    import numpy as np
+    import pandas as pd
+
+    tickers = trades_df['ticker'].astype(str).str.strip().str.upper()
+    kind = trades_df['type'].astype(str).str.lower()
+    disclosed = pd.to_datetime(trades_df['disclosure_date'], format='%m/%d/%Y', errors='coerce')
+    traded = pd.to_datetime(trades_df['transaction_date'], format='%Y-%m-%d', errors='coerce')
+
+    events = pd.DataFrame({
+        'row': trades_df.index,
+        'ticker': tickers,
+        'representative': trades_df['representative'],
+        'party': trades_df['party'],
+        'side': np.where(kind.eq('purchase'), 1, np.where(kind.str.startswith('sale'), -1, 0)),
+        'transaction_date': traded,
+        'disclosure_date': disclosed,
+        'anchor': disclosed if anchor == 'disclosure' else traded,
+    })
+    valid = tickers.str.match(SYMBOL_PATTERN) & events['side'].ne(0) & events['anchor'].notna()
+    return events[valid.to_numpy()].reset_index(drop=True)
+
+
+def asof_forward(price_keys, price_days, codes, days, tolerance_days):
+    """Index of the first bar on or after each (symbol code, day), or -1 if none within tolerance.
+
+    `price_keys` are code * KEY_SPAN + day for every bar, sorted ascending; one searchsorted
+    over them is a forward as-of join across all symbols at once.
+    """
+    import numpy as np
+
+    if not len(price_keys):
+        return np.full(len(codes), -1)
+    keys = codes * KEY_SPAN + days
+    index = np.minimum(np.searchsorted(price_keys, keys), len(price_keys) - 1)
+    found = (codes >= 0) & (price_keys[index] // KEY_SPAN == codes) & (price_days[index] - days <= tolerance_days)
+    return np.where(found & (price_keys[index] >= keys), index, -1)
+
+
+def take(values, index):
+    """values[index] as floats, NaN where the index is -1 (also safe when `values` is empty)"""
+    import numpy as np
+
+    result = np.full(len(index), np.nan)
+    found = index >= 0
+    result[found] = values[index[found]]
+    return result
+
+
+def forward_returns(events, bars, horizons=HORIZONS, tolerance_days=TOLERANCE_DAYS):
+    """Attach entry/exit closes and forward returns to each event with vectorized as-of joins.
+
+    `bars` is a long frame of symbol, date and close. The entry is the first close on or after
+    the anchor date and each exit the first close on or after anchor + horizon calendar days.
+    Returns are signed by side, so a sale followed by a drop counts as a hit.
+    """
+    import numpy as np
+    import pandas as pd
+
+    symbols = pd.Categorical(bars['symbol'])
+    price_codes = symbols.codes.astype('int64')
+    price_days = bars['date'].to_numpy().astype('datetime64[D]').astype('int64')
+    order = np.lexsort((price_days, price_codes))
+    price_keys = price_codes[order] * KEY_SPAN + price_days[order]
+    price_days = price_days[order]
+    closes = bars['close'].to_numpy(dtype=float)[order]
+
+    result = events.set_index('row')
+    codes = pd.Categorical(result['ticker'], categories=symbols.categories).codes.astype('int64')
+    anchor_days = result['anchor'].to_numpy().astype('datetime64[D]').astype('int64')
+
+    entry = asof_forward(price_keys, price_days, codes, anchor_days, tolerance_days)
+    entry_price = take(closes, entry)
+    result['entry_date'] = pd.to_datetime(take(price_days, entry), unit='D')
+    result['entry_price'] = entry_price
+
+    for horizon in horizons:
+        exit_ = asof_forward(price_keys, price_days, codes, anchor_days + horizon, tolerance_days)
+        change = take(closes, exit_) / entry_price - 1
+        signed = change * result['side'].to_numpy()
+        result[f'return_{horizon}d'] = change
+        result[f'signed_return_{horizon}d'] = signed
+        # NaN stays NaN so hit rates only count trades we could evaluate
+        result[f'hit_{horizon}d'] = np.where(np.isnan(signed), np.nan, signed > 0)
+    return result
+
+
+def member_summary(returns, horizons=HORIZONS):
+    """Per-member trade count, mean signed return and hit rate at each horizon"""
+    grouped = returns.groupby(['representative', 'party'], dropna=False)
+    summary = grouped.size().rename('trades').to_frame()
+    for horizon in horizons:
+        summary[f'evaluated_{horizon}d'] = grouped[f'signed_return_{horizon}d'].count()
+        summary[f'mean_return_{horizon}d'] = grouped[f'signed_return_{horizon}d'].mean()
+        summary[f'hit_rate_{horizon}d'] = grouped[f'hit_{horizon}d'].mean()
+    return summary.reset_index()
+
+
+class DisclosureReturns:
+    """Forward returns over the whole congress dataset, recomputed only when trades or bars change"""
+
+    def __init__(self, bar_store, horizons=HORIZONS, anchor='disclosure'):
+        self.bar_store = bar_store
+        self.horizons = horizons
+        self.anchor = anchor
+        self._lock = threading.Lock()
+        self._key = None
+        self._returns = None
+        self._members = None
+
+    def compute(self, trades_df):
+        key = (id(trades_df), len(trades_df), self.bar_store.version)
+        with self._lock:
+            if key != self._key:
+                events = prepare_events(trades_df, self.anchor)
+                bars = self.bar_store.load(symbols=events['ticker'].unique().tolist(),
+                                           start=events['anchor'].min())
+                self._returns = forward_returns(events, bars, self.horizons)
+                self._members = member_summary(self._returns, self.horizons)
+                self._key = key
+            return self._returns, self._members
+
+    def members(self, trades_df, horizon=30, min_trades=5, by='hit_rate', limit=20, ascending=False):
+        if horizon not in self.horizons:
+            raise ValueError(f'horizon must be one of {", ".join(map(str, self.horizons))}')
+        if by not in ('hit_rate', 'mean_return', 'evaluated', 'trades'):
+            raise ValueError('by must be hit_rate, mean_return, evaluated or trades')
+        _, members = self.compute(trades_df)
+        column = by if by == 'trades' else f'{by}_{horizon}d'
+        ranked = members[members[f'evaluated_{horizon}d'] >= min_trades]
+        ranked = ranked.sort_values([column, 'trades'], ascending=ascending, na_position='last').head(limit)
+        return ranked.astype(object).where(ranked.notna(), None).to_dict('records')
+
+    def trades(self, trades_df, representative=None, ticker=None, limit=100):
+        returns, _ = self.compute(trades_df)
+        if representative:
+            returns = returns[returns['representative'] == representative]
+        if ticker:
+            returns = returns[returns['ticker'] == ticker.upper()]
+        page = returns.sort_values('anchor', ascending=False).head(limit).reset_index()
+        return page.astype(object).where(page.notna(), None).to_dict('records')
+
+
+def main(argv=None):
+    import pandas as pd
+    from bar_store import BarStore
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default='all_transactions.csv')
+    parser.add_argument('--bars', default='bars.db')
+    parser.add_argument('--refresh', action='store_true', help='download missing daily bars first')
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    trades_df = pd.read_csv(args.csv)
+    store = BarStore(args.bars)
+    if args.refresh:
+        events = prepare_events(trades_df)
+        written = store.refresh(events['ticker'].unique().tolist(), start=events['anchor'].min().date())
+        print(f'Stored {written} bars')
+
+    engine = DisclosureReturns(store)
+    returns, _ = engine.compute(trades_df)
+    evaluated = returns[f'return_{args.horizon}d'].notna().sum()
+    print(f'{len(returns)} trades, {evaluated} with a {args.horizon}-day return')
+    for member in engine.members(trades_df, horizon=args.horizon, min_trades=args.min_trades, limit=args.top):
+        print(f"{member['representative']:<28} {str(member['party']):<12} trades {member['trades']:>4}  "
+              f"hit rate {member[f'hit_rate_{args.horizon}d']:.2f}  mean {member[f'mean_return_{args.horizon}d']:+.3%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,126 +1,246 @@
-# import os
-# from datetime import datetime, timedelta
-# from dotenv import load_dotenv
-# from alpaca.data.historical import CryptoHistoricalDataClient
-
-# # No keys required for crypto data
-# client = CryptoHistoricalDataClient()
-
-# # Load environment variables from .env file
-# load_dotenv()
-
-# # Get API credentials from environment variables
-# API_KEY = os.getenv("ALPACA_API_KEY")
-# API_SECRET = os.getenv("ALPACA_API_SECRET")
-# BASE_URL = os.getenv("ALPACA_API_BASE_URL", "https://paper-api.alpaca.markets")
-
+"""Export the account's full Alpaca order history to CSV or Parquet.
+
+Orders are fetched oldest first, a page at a time, and each page is written out before the next
+is requested, so memory stays flat however long the history is. Progress is saved in a cursor
+file next to the output; running the export again (or after a crash) continues from there and
+only fetches orders submitted since.
+
+    python fetch_alpaca_orders.py                          # orders.csv
+    python fetch_alpaca_orders.py --output orders.parquet  # directory of Parquet parts (needs pyarrow)
+    python fetch_alpaca_orders.py --full                   # start over, e.g. to refresh order statuses
+
+The cursor follows submission time, so an order exported while still open keeps that status
+until the next --full export.
+"""
+import argparse
+import glob
+import json
 import os
-from datetime import datetime, timedelta
+import sys
+import tempfile
+from datetime import timedelta
+
 from dotenv import load_dotenv
-import pandas as pd
-from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import GetOrdersRequest
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Get API credentials from environment variables
-API_KEY = os.getenv("ALPACA_API_KEY")
-API_SECRET = os.getenv("ALPACA_API_SECRET")
-BASE_URL = os.getenv("ALPACA_API_BASE_URL", "https://paper-api.alpaca.markets")
-
-# Initialize Trading client
-trading_client = TradingClient(API_KEY, API_SECRET, paper=True)
-
-# # Create a request to get recent orders
-# # By default, this gets open orders
-# request_params = GetOrdersRequest(
-#     status="all",       # Get all orders (open, closed, etc.)
-#     limit=50,           # Limit to 50 most recent orders
-#     direction="desc"    # Most recent first
-# )
-
-# # Get the orders
-# orders = trading_client.get_orders(request_params)
-
-# # Print order information
-# print(f"Found {len(orders)} recent orders:")
-# for order in orders:
-#     print(f"Order ID: {order.id}")
-#     print(f"Symbol: {order.symbol}")
-#     print(f"Side: {order.side}")
-#     print(f"Type: {order.type}")
-#     print(f"Qty: {order.qty}")
-#     print(f"Status: {order.status}")
-#     print(f"Created at: {order.created_at}")
-#     print("-" * 50)
-
-# # Optional: Convert to DataFrame for easier analysis
-# if orders:
-#     # Extract relevant fields from each order
-#     orders_data = [{
-#         'id': order.id,
-#         'client_order_id': order.client_order_id,
-#         'symbol': order.symbol,
-#         'side': order.side,
-#         'qty': order.qty,
-#         'filled_qty': order.filled_qty,
-#         'type': order.type,
-#         'status': order.status,
-#         'created_at': order.created_at,
-#         'submitted_at': order.submitted_at,
-#         'filled_at': order.filled_at
-#     } for order in orders]
-    
-#     # Create DataFrame
-#     orders_df = pd.DataFrame(orders_data)
-#     print("\nOrders DataFrame:")
-#     print(orders_df)
-#     # Save to CSV
-#     orders_df.to_csv('orders.csv', index=False)
-
-
-
-def fetch_alpaca_orders():
-    # Create a request to get recent orders
-    request_params = GetOrdersRequest(
-        status="all",       # Get all orders (open, closed, etc.)
-        limit=50,           # Limit to 50 most recent orders
-        direction="desc"    # Most recent first
-    )
-
-    # Get the orders
-    orders = trading_client.get_orders(request_params)
-
-    # Extract relevant fields from each order
-    print(orders)
-    orders_data = [{
-        'id': order.id,
-        'client_order_id': order.client_order_id,
-        'symbol': order.symbol,
-        'side': order.side,
-        'qty': order.qty,
-        'filled_qty': order.filled_qty,
-        'type': order.type,
-        'status': order.status,
-        'created_at': order.created_at,
-        'submitted_at': order.submitted_at,
-        'filled_at': order.filled_at
-    } for order in orders]
-
-    return orders_data
-
-
-fractional_order = place_order(
-    trading_client=trading_client,
-    symbol="AMZN",
-    side="buy",
-    qty=4,
-)
-
-
-orders = fetch_alpaca_orders()
-
-orders_df = pd.DataFrame(orders)
-print(orders_df)
-orders_df.to_csv('orders.csv', index=False)
+
+from rate_limit import SharedRateLimiter
+
+PAGE_SIZE = 500  # Alpaca's maximum
+PART_ROWS = 100_000
+
+# Orders submitted within this long before the cursor are requested again and skipped by id, so
+# pages that end partway through orders sharing a timestamp don't drop any
+OVERLAP = timedelta(seconds=1)
+
+COLUMNS = {
+    'id': 'string',
+    'client_order_id': 'string',
+    'symbol': 'string',
+    'side': 'string',
+    'type': 'string',
+    'order_class': 'string',
+    'time_in_force': 'string',
+    'status': 'string',
+    'qty': 'float64',
+    'notional': 'float64',
+    'filled_qty': 'float64',
+    'filled_avg_price': 'float64',
+    'limit_price': 'float64',
+    'stop_price': 'float64',
+    'created_at': 'datetime64[ns, UTC]',
+    'submitted_at': 'datetime64[ns, UTC]',
+    'updated_at': 'datetime64[ns, UTC]',
+    'filled_at': 'datetime64[ns, UTC]',
+    'canceled_at': 'datetime64[ns, UTC]',
+}
+
+
+def make_client():
+    import alpaca_trade_api as tradeapi
+
+    load_dotenv()
+    base_url = os.getenv('ALPACA_BASE_URL') or os.getenv('ALPACA_API_BASE_URL', 'https://paper-api.alpaca.markets')
+    return tradeapi.REST(os.getenv('ALPACA_API_KEY'), os.getenv('ALPACA_API_SECRET'), base_url, api_version='v2')
+
+
+def iter_order_pages(api, after=None, page_size=PAGE_SIZE, seen=None, limiter=None):
+    """Yield lists of orders oldest first, starting after `after`, until the history runs out.
+
+    `seen` maps ids of orders already exported within OVERLAP of `after` to their submission
+    time; it is updated in place so a caller can persist it with the cursor.
+    """
+    import pandas as pd
+
+    seen = {} if seen is None else seen
+    cursor = pd.Timestamp(after) if after is not None else None
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        since = (cursor - OVERLAP).isoformat() if cursor is not None else None
+        orders = api.list_orders(status='all', limit=page_size, after=since, direction='asc', nested=False)
+
+        fresh = [order for order in orders if str(order.id) not in seen]
+        if fresh:
+            cursor = max(pd.Timestamp(order.submitted_at) for order in fresh)
+            seen.update({str(order.id): pd.Timestamp(order.submitted_at).isoformat() for order in fresh})
+            # Only ids inside the overlap window can come back on the next request
+            for order_id, submitted in list(seen.items()):
+                if pd.Timestamp(submitted) < cursor - OVERLAP:
+                    del seen[order_id]
+            yield fresh, cursor
+        if len(orders) < page_size:
+            return
+        if not fresh:
+            raise RuntimeError(f'{page_size} orders submitted within {OVERLAP} of {cursor}; cannot page past them')
+
+
+def orders_frame(orders):
+    import pandas as pd
+
+    frame = pd.DataFrame([{column: getattr(order, column, None) for column in COLUMNS} for order in orders],
+                         columns=list(COLUMNS))
+    for column, dtype in COLUMNS.items():
+        if dtype == 'float64':
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+        elif dtype.startswith('datetime'):
+            frame[column] = pd.to_datetime(frame[column], utc=True, errors='coerce', format='ISO8601')
+        else:
+            frame[column] = frame[column].map(lambda v: None if v is None else str(v)).astype(dtype)
+    return frame
+
+
+class CsvSink:
+    """Appends pages to one CSV; the cursor records its size so a crash mid-write is rolled back"""
+
+    def __init__(self, path, state):
+        self.path = path
+        size = state.get('bytes')
+        if size is None:
+            open(path, 'w').close()
+        else:
+            with open(path, 'r+') as f:
+                f.truncate(size)
+        self.header = not size
+
+    def write(self, frame):
+        with open(self.path, 'a', newline='') as f:
+            frame.to_csv(f, header=self.header, index=False, date_format='%Y-%m-%dT%H:%M:%S.%fZ')
+            f.flush()
+            os.fsync(f.fileno())
+        self.header = False
+        return True
+
+    def close(self):
+        return True
+
+    def state(self):
+        return {'bytes': os.path.getsize(self.path)}
+
+
+class ParquetSink:
+    """Writes pages as row groups of numbered part files in a directory, renamed into place when full"""
+
+    def __init__(self, path, state, part_rows=PART_ROWS):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit('Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead')
+        self.path = path
+        self.part_rows = part_rows
+        self.part = state.get('parts', 0)
+        os.makedirs(path, exist_ok=True)
+        for stale in glob.glob(os.path.join(path, '*.tmp')):
+            os.remove(stale)  # an unfinished part from an interrupted run; its orders are fetched again
+        self._writer = None
+        self._rows = 0
+
+    def write(self, frame):
+        """Returns True once the rows written so far are durable"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._tmp = os.path.join(self.path, f'part-{self.part:05d}.parquet.tmp')
+            self._writer = pq.ParquetWriter(self._tmp, table.schema)
+        self._writer.write_table(table)
+        self._rows += len(frame)
+        return self._rows >= self.part_rows and self.close()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._tmp, os.path.join(self.path, f'part-{self.part:05d}.parquet'))
+            self._writer, self._rows = None, 0
+            self.part += 1
+        return True
+
+    def state(self):
+        return {'parts': self.part}
+
+
+def load_cursor(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_cursor(path, cursor):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(cursor, f, indent=2)
+    os.replace(tmp, path)
+
+
+def export_orders(api, output, fmt=None, cursor_path=None, full=False, page_size=PAGE_SIZE, limiter=None):
+    """Stream every order not yet exported to `output`; returns the number of orders written"""
+    fmt = fmt or ('csv' if output.endswith('.csv') else 'parquet')
+    cursor_path = cursor_path or f'{output.rstrip(os.sep)}.cursor.json'
+    cursor = {} if full else load_cursor(cursor_path)
+    if cursor.get('format', fmt) != fmt:
+        raise SystemExit(f'{cursor_path} belongs to a {cursor["format"]} export; pass --full to start over')
+    if full and fmt == 'parquet':
+        for part in glob.glob(os.path.join(output, 'part-*.parquet')):
+            os.remove(part)
+
+    sink = CsvSink(output, cursor) if fmt == 'csv' else ParquetSink(output, cursor)
+    seen = dict(cursor.get('seen', {}))
+    last = None
+    written = 0
+    try:
+        for orders, after in iter_order_pages(api, cursor.get('after'), page_size, seen, limiter):
+            durable = sink.write(orders_frame(orders))
+            written += len(orders)
+            last = {'format': fmt, 'after': after.isoformat(), 'seen': dict(seen), 'rows': cursor.get('rows', 0) + written}
+            if durable:
+                save_cursor(cursor_path, dict(last, **sink.state()))
+            print(f'{written} orders exported, through {after}', file=sys.stderr)
+    finally:
+        # Keep what was fetched before an error, so the next run resumes after it
+        if last is not None and sink.close():
+            save_cursor(cursor_path, dict(last, **sink.state()))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='orders.csv', help='.csv file, or a directory for Parquet parts')
+    parser.add_argument('--format', choices=['csv', 'parquet'], help='default: from the output name')
+    parser.add_argument('--cursor', help='default: <output>.cursor.json')
+    parser.add_argument('--full', action='store_true', help='ignore the cursor and export everything again')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    api = make_client()
+    # Same budget as the running API server, so an export never pushes the account over its limit
+    limiter = SharedRateLimiter(os.getenv('SHARED_CACHE_PATH', 'shared_cache.db'), 'alpaca',
+                                int(os.getenv('ALPACA_RATE_LIMIT', '190')), per=60,
+                                burst=int(os.getenv('ALPACA_RATE_BURST', '10')))
+    written = export_orders(api, args.output, args.format, args.cursor, args.full, args.page_size, limiter)
+    print(f'Exported {written} new orders to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
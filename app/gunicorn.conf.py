@@ -0,0 +1,70 @@
+"""Production settings: `cd app && gunicorn` picks this file up automatically"""
+import multiprocessing
+import os
+
+# Index sync and the prefetch thread are started by the hooks below, not per import
+wsgi_app = 'app:create_app(sync_index=False, prefetch=False)'
+bind = os.getenv('BIND', '0.0.0.0:5001')
+
+# Handlers mostly wait on Alpaca/yfinance/Finnhub, so a few processes with many threads each
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks in upstream clients can't build up
+max_requests = 2000
+max_requests_jitter = 200
+
+# Import the app once in the parent; workers share its pages copy-on-write
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    """Do one-off warm-up in the parent before any worker is forked"""
+    from search_index import SearchIndex
+    from app import logger
+
+    # Sync the congress index here instead of once per worker; close it so no handle crosses the fork
+    try:
+        index = SearchIndex(os.getenv('SEARCH_INDEX_PATH', 'search_index.db'))
+        added = index.sync_congress_csv('all_transactions.csv')
+        index.close()
+        logger.info(f"Indexed {added} new congressional transactions")
+    except Exception as e:
+        logger.error(f"Error indexing congressional transactions: {str(e)}")
+
+    try:
+        from app import get_congress_rollups
+        get_congress_rollups()
+    except Exception as e:
+        logger.error(f"Error rolling up congressional transactions: {str(e)}")
+
+    # Load the recommender models once so every worker inherits them
+    try:
+        from model.model import get_loaded_model
+        from model.item_model import get_item_model
+        get_loaded_model()
+        get_item_model()
+    except Exception as e:
+        logger.error(f"Error loading recommender model: {str(e)}")
+
+    # Build the symbol autocomplete index (which also loads the model) once for all workers
+    try:
+        from app import symbol_index
+        symbol_index.stats()
+    except Exception as e:
+        logger.error(f"Error building symbol index: {str(e)}")
+
+
+def post_fork(server, worker):
+    """Threads and SQLite handles don't survive fork, so each worker starts its own background work"""
+    import threading
+    from app import prefetcher, warm_disclosure_returns
+
+    if os.getenv('PREFETCH', '1') == '1':
+        prefetcher.start()
+    threading.Thread(target=warm_disclosure_returns, daemon=True).start()
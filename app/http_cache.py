@@ -0,0 +1,70 @@
+import gzip
+import hashlib
+from functools import wraps
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+
+
+def choose_encoding(accept_encoding, size):
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def conditional(max_age=0, public=False):
+    """Add a content-hash ETag, Cache-Control and compression to a GET view.
+
+    `max_age` may be a number of seconds or a callable taking the request and
+    returning one, for endpoints whose freshness depends on query parameters.
+    Requests whose If-None-Match matches the current ETag get an empty 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = current_app.make_response(view(*args, **kwargs))
+            if request.method != 'GET' or response.status_code != 200 or response.direct_passthrough:
+                return response
+
+            body = response.get_data()
+            encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), len(body))
+            # Each encoding is a distinct representation, so it gets its own validator
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            if encoding:
+                etag += f'-{encoding}'
+
+            seconds = max_age(request) if callable(max_age) else max_age
+            response.headers['Cache-Control'] = f"{'public' if public else 'private'}, max-age={seconds}"
+            response.vary.add('Accept-Encoding')
+            response.set_etag(etag)
+
+            # If-None-Match uses the weak comparison (RFC 9110), so W/"..." from a re-compressing proxy still matches
+            if request.if_none_match.contains_weak(etag):
+                not_modified = current_app.response_class(status=304)
+                for header in ('ETag', 'Cache-Control', 'Vary'):
+                    not_modified.headers[header] = response.headers[header]
+                return not_modified
+
+            if encoding:
+                response.set_data(compress(body, encoding))
+                response.headers['Content-Encoding'] = encoding
+            return response
+        return wrapper
+    return decorator
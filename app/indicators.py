@@ -0,0 +1,294 @@
+"""Technical indicators over daily closes, in bulk and one bar at a time.
+
+The array functions take closes with time on axis 0, either one series or a date x symbol
+matrix, and compute every column at once. IndicatorState carries the same indicators forward
+one close at a time in constant work per bar, so a symbol's latest values stay current as new
+bars arrive without going back over its history.
+"""
+import copy
+import math
+import threading
+from collections import OrderedDict
+
+# SMA windows, EMA spans, RSI period, MACD (fast, slow, signal), Bollinger (window, width in std devs)
+DEFAULTS = {'sma': (20, 50), 'ema': (12, 26), 'rsi': 14, 'macd': (12, 26, 9), 'bollinger': (20, 2.0)}
+
+
+def rolling_mean_std(closes, window):
+    """Trailing mean and standard deviation per column from cumulative sums; NaN until a full window"""
+    import numpy as np
+
+    closes = np.asarray(closes, dtype=float)
+    filled = np.nan_to_num(closes)
+    valid = np.isfinite(closes).astype(float)
+    zero = np.zeros((1,) + closes.shape[1:])
+    sums = np.concatenate([zero, np.cumsum(filled, axis=0)])
+    squares = np.concatenate([zero, np.cumsum(filled ** 2, axis=0)])
+    counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+
+    mean = np.full_like(closes, np.nan)
+    std = np.full_like(closes, np.nan)
+    n = counts[window:] - counts[:-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m = (sums[window:] - sums[:-window]) / n
+        var = (squares[window:] - squares[:-window]) / n - m ** 2
+    full = n == window
+    mean[window - 1:] = np.where(full, m, np.nan)
+    std[window - 1:] = np.where(full, np.sqrt(np.maximum(var, 0)), np.nan)
+    return mean, std
+
+
+def smooth(values, alpha):
+    """Exponential smoothing y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with each column's first value.
+
+    The recursion runs down the rows with each step applied to every column at once. Leading NaNs
+    (a symbol that starts trading later) stay NaN and gaps hold the last value.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        # One series: plain floats beat per-element numpy calls
+        out, y = [], math.nan
+        for x in values.tolist():
+            if x == x:
+                y = x if y != y else alpha * x + (1 - alpha) * y
+            out.append(y)
+        return np.array(out)
+
+    result = np.empty_like(values)
+    y = np.full(values.shape[1:], np.nan)
+    for t, x in enumerate(values):
+        y = np.where(np.isnan(x), y, np.where(np.isnan(y), x, alpha * x + (1 - alpha) * y))
+        result[t] = y
+    return result
+
+
+def ema(closes, span):
+    return smooth(closes, 2 / (span + 1))
+
+
+def rsi_components(closes, period):
+    """Wilder-smoothed average gain and loss per bar"""
+    import numpy as np
+
+    closes = np.asarray(closes, dtype=float)
+    delta = np.diff(closes, axis=0, prepend=closes[:1])
+    gains = smooth(np.where(delta > 0, delta, 0.0) + 0 * closes, 1 / period)
+    losses = smooth(np.where(delta < 0, -delta, 0.0) + 0 * closes, 1 / period)
+    return gains, losses
+
+
+def rsi_from(gains, losses):
+    import numpy as np
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(losses > 0, 100 - 100 / (1 + gains / losses), np.where(gains > 0, 100.0, 50.0))
+
+
+def compute(closes, params=DEFAULTS):
+    """Every indicator for every bar, as {name: array shaped like closes}"""
+    import numpy as np
+
+    closes = np.asarray(closes, dtype=float)
+    result = {}
+    for window in params['sma']:
+        result[f'sma{window}'] = rolling_mean_std(closes, window)[0]
+    for span in params['ema']:
+        result[f'ema{span}'] = ema(closes, span)
+
+    period = params['rsi']
+    gains, losses = rsi_components(closes, period)
+    rsi = rsi_from(gains, losses)
+    rsi[:period] = np.nan  # not enough moves to mean anything yet
+    result[f'rsi{period}'] = np.where(np.isfinite(closes), rsi, np.nan)
+
+    fast, slow, signal = params['macd']
+    macd = ema(closes, fast) - ema(closes, slow)
+    result['macd'] = macd
+    result['macdSignal'] = ema(macd, signal)
+    result['macdHist'] = macd - result['macdSignal']
+
+    window, width = params['bollinger']
+    middle, std = rolling_mean_std(closes, window)
+    result['bbMiddle'] = middle
+    result['bbUpper'] = middle + width * std
+    result['bbLower'] = middle - width * std
+    return result
+
+
+class IndicatorState:
+    """Indicator values for one symbol, advanced by update(close) in constant time.
+
+    EMAs and Wilder averages are recursive, and windowed sums keep a ring buffer of the last
+    closes plus running totals, so a new bar costs the same however long the history is.
+    Build one from history with from_closes(), which takes the vectorized pass's final values.
+    """
+
+    def __init__(self, params=DEFAULTS):
+        import numpy as np
+
+        self.params = params
+        self.windows = sorted(set(params['sma']) | {params['bollinger'][0]})
+        self.spans = sorted(set(params['ema']) | set(params['macd'][:2]))
+        self.ring = np.full(max(self.windows), np.nan)
+        self.count = 0
+        self.sums = {w: 0.0 for w in self.windows}
+        self.squares = {w: 0.0 for w in self.windows}
+        self.emas = {s: None for s in self.spans}
+        self.signal = None
+        self.gain = self.loss = None
+        self.close = None
+        self.date = None
+
+    @classmethod
+    def from_closes(cls, closes, date=None, params=DEFAULTS):
+        import numpy as np
+
+        state = cls(params)
+        closes = np.asarray(closes, dtype=float)
+        closes = closes[np.isfinite(closes)]
+        if not len(closes):
+            return state
+        for span in state.spans:
+            state.emas[span] = float(ema(closes, span)[-1])
+        fast, slow, signal = params['macd']
+        state.signal = float(ema(ema(closes, fast) - ema(closes, slow), signal)[-1])
+        gains, losses = rsi_components(closes, params['rsi'])
+        state.gain, state.loss = float(gains[-1]), float(losses[-1])
+
+        # Bar i lives at ring[i % size], the same slot update() would have written it to
+        tail = closes[-len(state.ring):]
+        state.count = len(closes)
+        state.ring[np.arange(state.count - len(tail), state.count) % len(state.ring)] = tail
+        for w in state.windows:
+            last = closes[-w:]
+            state.sums[w], state.squares[w] = float(last.sum()), float((last ** 2).sum())
+        state.close = float(closes[-1])
+        state.date = date
+        return state
+
+    def update(self, close, date=None):
+        """Fold in the next bar's close and return the latest values"""
+        close = float(close)
+        size = len(self.ring)
+        for w in self.windows:
+            if self.count >= w:
+                leaving = self.ring[(self.count - w) % size]
+                self.sums[w] -= leaving
+                self.squares[w] -= leaving * leaving
+            self.sums[w] += close
+            self.squares[w] += close * close
+        self.ring[self.count % size] = close
+
+        for span in self.spans:
+            alpha = 2 / (span + 1)
+            previous = self.emas[span]
+            self.emas[span] = close if previous is None else alpha * close + (1 - alpha) * previous
+        fast, slow, signal = self.params['macd']
+        macd = self.emas[fast] - self.emas[slow]
+        alpha = 2 / (signal + 1)
+        self.signal = macd if self.signal is None else alpha * macd + (1 - alpha) * self.signal
+
+        period = self.params['rsi']
+        move = close - self.close if self.close is not None else 0.0
+        if self.gain is None:
+            self.gain, self.loss = max(move, 0.0), max(-move, 0.0)
+        else:
+            self.gain += (max(move, 0.0) - self.gain) / period
+            self.loss += (max(-move, 0.0) - self.loss) / period
+
+        self.count += 1
+        self.close = close
+        self.date = date
+        return self.values()
+
+    def peek(self, close, date=None):
+        """Values as if `close` were the next bar, without committing it (for a bar still forming)"""
+        return copy.deepcopy(self).update(close, date)
+
+    def values(self):
+        result = {'close': self.close}
+        for w in self.params['sma']:
+            result[f'sma{w}'] = self.sums[w] / w if self.count >= w else None
+        for span in self.params['ema']:
+            result[f'ema{span}'] = self.emas[span]
+        period = self.params['rsi']
+        if self.count > period:
+            result[f'rsi{period}'] = 100 - 100 / (1 + self.gain / self.loss) if self.loss > 0 else (
+                100.0 if self.gain > 0 else 50.0)
+        else:
+            result[f'rsi{period}'] = None
+        fast, slow, _ = self.params['macd']
+        if self.signal is not None:
+            macd = self.emas[fast] - self.emas[slow]
+            result.update(macd=macd, macdSignal=self.signal, macdHist=macd - self.signal)
+        else:
+            result.update(macd=None, macdSignal=None, macdHist=None)
+        window, width = self.params['bollinger']
+        if self.count >= window:
+            mean = self.sums[window] / window
+            std = math.sqrt(max(self.squares[window] / window - mean * mean, 0))
+            result.update(bbMiddle=mean, bbUpper=mean + width * std, bbLower=mean - width * std)
+        else:
+            result.update(bbMiddle=None, bbUpper=None, bbLower=None)
+        return result
+
+
+class IndicatorTracker:
+    """Latest indicators per symbol, folding in only the bars that arrived since the last call.
+
+    latest(symbol, bars) takes the symbol's recent daily bars (yfinance layout). Every bar but
+    the last is committed to the symbol's IndicatorState; the last may still be forming, so it
+    is applied to a copy. If the history no longer lines up with the state (too old, or closes
+    revised after a split), the state is rebuilt from the bars in one vectorized pass. Only the
+    `max_symbols` most recently used symbols keep a state.
+    """
+
+    def __init__(self, params=DEFAULTS, max_symbols=2000):
+        self.params = params
+        self.max_symbols = max_symbols
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+        self.rebuilds = 0
+        self.updates = 0
+
+    def latest(self, symbol, bars):
+        closes = bars['Close'].dropna()
+        if closes.empty:
+            return None
+        dates = [str(d)[:10] for d in closes.index]
+        values = closes.to_numpy(dtype=float)
+        with self._lock:
+            state = self._states.get(symbol)
+            position = dates.index(state.date) if state is not None and state.date in dates[:-1] else -1
+            if position < 0 or values[position] != state.close:
+                state = IndicatorState.from_closes(values[:-1], dates[-2] if len(dates) > 1 else None, self.params)
+                self.rebuilds += 1
+            else:
+                for date, close in zip(dates[position + 1:-1], values[position + 1:-1]):
+                    state.update(close, date)
+                    self.updates += 1
+            self._states[symbol] = state
+            self._states.move_to_end(symbol)
+            if len(self._states) > self.max_symbols:
+                self._states.popitem(last=False)
+            latest = state.peek(values[-1], dates[-1])
+        return dict(latest, date=dates[-1])
+
+    def stats(self):
+        return {'symbols': len(self._states), 'rebuilds': self.rebuilds, 'updates': self.updates}
+
+
+def series(bars, points=100, params=DEFAULTS):
+    """The last `points` bars with every indicator, computed in one vectorized pass"""
+    import numpy as np
+
+    closes = bars['Close'].dropna()
+    columns = compute(closes.to_numpy(dtype=float), params)
+    rows = []
+    for i in range(max(len(closes) - points, 0), len(closes)):
+        row = {'date': str(closes.index[i])[:10], 'close': float(closes.iloc[i])}
+        row.update({name: float(v[i]) if np.isfinite(v[i]) else None for name, v in columns.items()})
+        rows.append(row)
+    return rows
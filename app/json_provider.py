@@ -0,0 +1,97 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import sys
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder with the same conversions
+    orjson = None
+
+
+def default(obj):
+    """Convert values neither orjson nor the stdlib serialize natively"""
+    # NumPy/pandas objects can only exist if those libraries were imported by someone else
+    pd = sys.modules.get('pandas')
+    np = sys.modules.get('numpy')
+    if pd is not None:
+        if obj is pd.NaT:
+            return None
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return replace_non_finite(obj.tolist())
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return replace_non_finite(obj.item())
+        if isinstance(obj, np.ndarray):
+            return replace_non_finite(obj.tolist())
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    # Alpaca entities carry their decoded JSON payload in _raw
+    raw = getattr(obj, '_raw', None)
+    if isinstance(raw, dict):
+        return raw
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class NaNSafeEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return default(obj)
+
+    def iterencode(self, obj, _one_shot=False):
+        # Stdlib writes NaN/Infinity literals, which browsers reject; emit null like orjson
+        return super().iterencode(replace_non_finite(obj), _one_shot)
+
+
+def replace_non_finite(obj):
+    if isinstance(obj, float):
+        return obj if obj == obj and obj not in (float('inf'), float('-inf')) else None
+    if isinstance(obj, dict):
+        return {k: replace_non_finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [replace_non_finite(v) for v in obj]
+    return obj
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with NumPy, pandas and datetime support.
+
+    NaN and infinite floats are written as null. Keys are not sorted.
+    """
+
+    sort_keys = False
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            kwargs.setdefault('cls', NaNSafeEncoder)
+            kwargs.setdefault('allow_nan', False)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None:
+            body = self.dumps(obj)
+        else:
+            # Skip the bytes -> str -> bytes round trip of dumps()
+            body = orjson.dumps(obj, default=default, option=self.option)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,33 @@
+import threading
+import time
+
+
+class LazyObject:
+    """Proxy that builds its target on first attribute access and records how long that took"""
+
+    def __init__(self, factory, name=None):
+        self._factory = factory
+        self._name = name or getattr(factory, '__name__', 'lazy')
+        self._target = None
+        self._lock = threading.Lock()
+        self.init_ms = None
+
+    def _get(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    start = time.perf_counter()
+                    self._target = self._factory()
+                    self.init_ms = (time.perf_counter() - start) * 1000
+        return self._target
+
+    @property
+    def initialized(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __repr__(self):
+        state = 'initialized' if self.initialized else 'pending'
+        return f'<LazyObject {self._name} ({state})>'
@@ -0,0 +1,193 @@
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice
+
+from flask import Response, g, has_request_context, request
+
+from proxy import CallProxy
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SIZE_SAMPLE = 10  # entries of a dict or list serialized to estimate its size
+
+
+def escape_label(value):
+    """Backslash, double quote and newline escaped as the Prometheus text format requires"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{escape_label(value)}"' for name, value in labels)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        label_str = format_labels(labels)
+        sep = ',' if label_str else ''
+        lines = [
+            f'{name}_bucket{{{label_str}{sep}le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{label_str}{sep}le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{label_str}}} {self.sum}')
+        lines.append(f'{name}_count{{{label_str}}} {self.count}')
+        return lines
+
+
+def payload_size(result):
+    """Approximate size in bytes of an upstream response"""
+    if isinstance(result, (bytes, str)):
+        return len(result)
+    # Only look for DataFrames if something has already imported pandas
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True).sum())
+    if isinstance(result, (dict, list)):
+        # Serializing the whole response would cost more than the call; scale up a few entries instead
+        sample = list(islice(result.items() if isinstance(result, dict) else result, SIZE_SAMPLE))
+        if not sample:
+            return 2
+        return len(json.dumps(sample, default=str)) * len(result) // len(sample)
+    return None
+
+
+class Metrics:
+    """Request and upstream latency histograms, error counts and payload sizes in Prometheus format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.request_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.upstream_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.upstream_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.upstream_errors = defaultdict(int)
+        self.gauges = {}
+
+    def observe_request(self, route, method, status, seconds, size):
+        with self._lock:
+            self.request_latency[(('route', route), ('method', method), ('status', status))].observe(seconds)
+            if size is not None:
+                self.request_bytes[(('route', route), ('method', method))].observe(size)
+
+    def observe_upstream(self, upstream, operation, seconds, size=None, error=False):
+        labels = (('upstream', upstream), ('operation', operation))
+        with self._lock:
+            self.upstream_latency[labels].observe(seconds)
+            if size is not None:
+                self.upstream_bytes[labels].observe(size)
+            if error:
+                self.upstream_errors[labels] += 1
+
+        # Per-request breakdown for the Server-Timing header
+        if has_request_context():
+            timings = g.setdefault('upstream_timings', defaultdict(lambda: [0, 0.0]))
+            timings[upstream][0] += 1
+            timings[upstream][1] += seconds
+
+    def observe_call(self, upstream, operation, fn):
+        """fn(), recording its latency, payload size or failure as an upstream call"""
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            self.observe_upstream(upstream, operation, time.perf_counter() - start, error=True)
+            raise
+        self.observe_upstream(upstream, operation, time.perf_counter() - start, payload_size(result))
+        return result
+
+    @contextmanager
+    def track_upstream(self, upstream, operation):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe_upstream(upstream, operation, time.perf_counter() - start, error=True)
+            raise
+        self.observe_upstream(upstream, operation, time.perf_counter() - start)
+
+    def register_gauge(self, name, help_text, fn):
+        """Expose the value returned by `fn()` (a number or {label value: number}) at scrape time"""
+        self.gauges[name] = (help_text, fn)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, help_text, series in (
+                ('http_request_duration_seconds', 'Flask request latency', self.request_latency),
+                ('http_response_size_bytes', 'Flask response body size', self.request_bytes),
+                ('upstream_request_duration_seconds', 'Upstream call latency', self.upstream_latency),
+                ('upstream_response_size_bytes', 'Approximate upstream payload size', self.upstream_bytes),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(series.items()):
+                    lines += histogram.render(name, labels)
+
+            lines += ['# HELP upstream_errors_total Upstream calls that raised', '# TYPE upstream_errors_total counter']
+            for labels, count in sorted(self.upstream_errors.items()):
+                lines.append(f'upstream_errors_total{{{format_labels(labels)}}} {count}')
+
+        for name, (help_text, fn) in self.gauges.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+            value = fn()
+            if isinstance(value, dict):
+                for label, v in value.items():
+                    lines.append(f'{name}{{{format_labels([("name", label)])}}} {v}')
+            else:
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app, timing_header=False):
+        """Time every request and serve the registry at /metrics"""
+
+        @app.before_request
+        def start_timer():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            start = g.get('request_start')
+            if start is None:
+                return response
+            elapsed = time.perf_counter() - start
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            size = None if response.is_streamed else response.calculate_content_length()
+            self.observe_request(route, request.method, response.status_code, elapsed, size)
+
+            if timing_header or request.args.get('timing') or request.headers.get('X-Timing'):
+                parts = [
+                    f'{upstream};dur={seconds * 1000:.2f};desc="{calls} calls"'
+                    for upstream, (calls, seconds) in g.get('upstream_timings', {}).items()
+                ]
+                parts.append(f'app;dur={elapsed * 1000:.2f}')
+                existing = response.headers.get('Server-Timing')
+                response.headers['Server-Timing'] = ', '.join(([existing] if existing else []) + parts)
+            return response
+
+        @app.route('/metrics', methods=['GET'])
+        def prometheus_metrics():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics()
+
+
+def instrument(target, upstream):
+    """Proxy around an upstream client that records latency, errors and payload size of every call"""
+    return CallProxy(target, lambda name, fn: metrics.observe_call(upstream, name, fn))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+
+def split_holdout(trades_df, holdout_frac=0.2, min_symbols=3, seed=0):
+    """Hold out a share of each user's distinct symbols as the test set.
+
+    Users with fewer than `min_symbols` distinct symbols stay entirely in training.
+    Every trade of a held-out (user, symbol) pair moves to the test set so the model
+    never sees it.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = trades_df[['user_id', 'symbol']].drop_duplicates()
+    counts = pairs.groupby('user_id')['symbol'].transform('size')
+    eligible = pairs[counts >= min_symbols]
+    held = eligible[rng.random(len(eligible)) < holdout_frac]
+
+    key = pd.MultiIndex.from_frame(trades_df[['user_id', 'symbol']])
+    is_test = key.isin(pd.MultiIndex.from_frame(held))
+    return trades_df[~is_test].reset_index(drop=True), trades_df[is_test].reset_index(drop=True)
+
+
+def evaluate_recommender(recommend, train_df, test_df, k=5, max_users=None, seed=0):
+    """Offline hit rate, precision@k and recall@k of `recommend(user_id, k, seen)`.
+
+    `seen` is the set of symbols the user traded in training; recommendations of
+    those are dropped before scoring, as they cannot be new information.
+    """
+    test_items = test_df.groupby('user_id')['symbol'].agg(set)
+    seen_items = train_df.groupby('user_id')['symbol'].agg(set)
+    users = test_items.index.intersection(seen_items.index)
+    if max_users is not None and len(users) > max_users:
+        users = pd.Index(np.random.default_rng(seed).choice(users, max_users, replace=False))
+
+    hits = 0
+    precision = 0.0
+    recall = 0.0
+    for user_id in users:
+        seen = seen_items[user_id]
+        recs = [s for s in recommend(user_id, k, seen) if s not in seen][:k]
+        relevant = test_items[user_id]
+        n_hit = len(relevant.intersection(recs))
+        hits += n_hit > 0
+        precision += n_hit / k
+        recall += n_hit / len(relevant)
+
+    n = max(len(users), 1)
+    return {'users': int(len(users)), 'k': k, 'hit_rate': hits / n,
+            'precision_at_k': precision / n, 'recall_at_k': recall / n}
+
+
+def popularity_baseline(train_df):
+    """Recommend the most traded symbols the user has not traded yet"""
+    ranked = train_df['symbol'].value_counts().index.tolist()
+
+    def recommend(user_id, k, seen):
+        return [s for s in ranked if s not in seen][:k]
+
+    return recommend
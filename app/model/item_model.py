@@ -0,0 +1,408 @@
+"""Item-item recommender: precomputed top-k similar symbols from time-decayed, side-aware weights.
+
+Run from the app directory. Build the artifact from the stored trades, or fold new trades
+(CSV in the trades_df schema) into the current one without a full rebuild:
+
+    python -m model.item_model build
+    python -m model.item_model update new_trades.csv
+
+Each run writes a new versioned artifact under model/artifacts/ and then repoints CURRENT at
+it; running servers notice the change and swap the new model in.
+
+An update is approximate for symbols that were not traded in the batch: they re-rank only their
+stored candidates (the top SPARE_FACTOR * k) plus the traded symbols, so a neighbor that ranked
+below the stored candidates can't come back. Every REBUILD_AFTER updates (or when most symbols
+were traded) the neighbor lists are recomputed exactly, which bounds the drift.
+"""
+import argparse
+import logging
+import math
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_DAYS = 90
+SELL_WEIGHT = -0.5
+NEIGHBORS = 20
+# Candidates kept per symbol, as a multiple of k, so an incremental update has replacements for
+# neighbors that drop out; recommendations only use the first k
+SPARE_FACTOR = 2
+# Incremental updates between exact recomputations of every neighbor list
+REBUILD_AFTER = 10
+
+DEFAULT_PATH = './model/item_model.pkl'
+ARTIFACT_DIR = './model/artifacts'
+KEEP_VERSIONS = 5
+
+
+def trade_dates(trades_df):
+    # Stored trades mix Timestamps and 'YYYY-MM-DD' strings
+    return pd.to_datetime(trades_df['trade_date'].astype(str).str[:10], format='%Y-%m-%d', errors='coerce')
+
+
+def interaction_weights(trades_df, as_of=None, half_life_days=HALF_LIFE_DAYS, sell_weight=SELL_WEIGHT,
+                        positive_only=True):
+    """Net interest of each user in each symbol.
+
+    Every trade counts log(1 + quantity), halved every `half_life_days` before `as_of`, and
+    sells count `sell_weight` times as much (negative: selling out signals lost interest).
+    Returns a (user_id, symbol) -> weight Series, by default with only positive weights kept.
+    """
+    dates = trade_dates(trades_df)
+    as_of = pd.Timestamp(as_of) if as_of is not None else dates.max()
+    age_days = (as_of - dates).dt.days.clip(lower=0).fillna(0).to_numpy()
+    side = np.where(trades_df['trade_type'].astype(str).str.lower().eq('sell'), sell_weight, 1.0)
+    quantity = pd.to_numeric(trades_df['quantity'], errors='coerce').fillna(1).clip(lower=0).to_numpy()
+
+    weight = side * np.log1p(quantity) * 0.5 ** (age_days / half_life_days)
+    totals = pd.Series(weight, index=pd.MultiIndex.from_arrays(
+        [trades_df['user_id'].to_numpy(), trades_df['symbol'].to_numpy()], names=['user_id', 'symbol']
+    )).groupby(level=[0, 1]).sum()
+    return totals[totals > 0] if positive_only else totals
+
+
+def to_matrix(weights, users=None, symbols=None):
+    """Sparse users x symbols matrix of `weights`, optionally in a given row/column order"""
+    users = pd.Index(users if users is not None else weights.index.get_level_values(0).unique())
+    symbols = pd.Index(symbols if symbols is not None else weights.index.get_level_values(1).unique())
+    rows = users.get_indexer(weights.index.get_level_values(0))
+    cols = symbols.get_indexer(weights.index.get_level_values(1))
+    matrix = sparse.csr_matrix((weights.to_numpy(dtype=np.float32), (rows, cols)),
+                               shape=(len(users), len(symbols)))
+    return matrix, users, symbols
+
+
+def positive_part(net):
+    """Interest matrix from net weights: selling more than you bought leaves no interest, not negative"""
+    matrix = net.copy()
+    matrix.data = np.maximum(matrix.data, 0)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    return (matrix @ sparse.diags(1 / np.where(norms > 0, norms, 1))).tocsc().astype(np.float32)
+
+
+def select_top_k(candidates, candidate_scores, k):
+    """Best k of each row's candidates, sorted by score"""
+    top = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k] if k else np.zeros((len(candidates), 0), int)
+    top_scores = np.take_along_axis(candidate_scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return (np.take_along_axis(np.take_along_axis(candidates, top, axis=1), order, axis=1).astype(np.int32),
+            np.take_along_axis(top_scores, order, axis=1).astype(np.float32))
+
+
+def column_similarities(normalized, columns):
+    """Cosine similarity of the given columns to every column, zeroing each column with itself"""
+    block = (normalized[:, columns].T @ normalized).toarray()
+    block[np.arange(len(columns)), columns] = 0  # not your own neighbor
+    return block
+
+
+def top_k_neighbors(matrix, k=NEIGHBORS, block_size=1024):
+    """Top-k cosine neighbors of every column, computed a block of columns at a time"""
+    normalized = normalize_columns(matrix)
+    n = normalized.shape[1]
+    k = min(k, max(n - 1, 0))
+    neighbors = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        columns = np.arange(start, min(start + block_size, n))
+        block = column_similarities(normalized, columns)
+        candidates = np.broadcast_to(np.arange(n), block.shape)
+        neighbors[columns], scores[columns] = select_top_k(candidates, block, k)
+    return neighbors, scores
+
+
+def build_item_model(trades_df, k=NEIGHBORS, as_of=None, half_life_days=HALF_LIFE_DAYS, sell_weight=SELL_WEIGHT):
+    dates = trade_dates(trades_df)
+    as_of = pd.Timestamp(as_of) if as_of is not None else dates.max()
+    # Net weights are kept so later updates clip the running total, as a full build would
+    net, users, symbols = to_matrix(interaction_weights(trades_df, as_of, half_life_days, sell_weight,
+                                                        positive_only=False))
+    matrix = positive_part(net)
+    neighbors, scores = top_k_neighbors(matrix, k * SPARE_FACTOR)
+    return {
+        'symbols': symbols,
+        'neighbors': neighbors,
+        'scores': scores,
+        # Fallback ranking when a user's holdings have too few neighbors
+        'popular': np.argsort(-np.asarray(matrix.sum(axis=0)).ravel(), kind='stable')[:100],
+        'matrix': matrix,
+        'net': net,
+        'users': users,
+        'as_of': as_of,
+        'params': {'k': k, 'half_life_days': half_life_days, 'sell_weight': sell_weight},
+        'updates': 0,
+    }
+
+
+def parse_day(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def update_item_model(item_model, trades_df, as_of=None):
+    """Fold new trades into a built model, recomputing neighbors only where they can change.
+
+    Existing weights decay to the new `as_of` (a uniform scale that leaves cosines alone), and
+    the new trades' net weights are added, so only the columns of symbols traded in the batch
+    change. Those get exact neighbor lists. Every other symbol keeps its stored candidates that
+    were not touched and merges in its similarity to the touched ones, which is approximate (see
+    the module docstring) until the next exact recomputation.
+    """
+    params = item_model['params']
+    dates = trade_dates(trades_df)
+    as_of = max(item_model['as_of'], pd.Timestamp(as_of) if as_of is not None else dates.max())
+    decay = 0.5 ** ((as_of - item_model['as_of']).days / params['half_life_days'])
+    delta = interaction_weights(trades_df, as_of, params['half_life_days'], params['sell_weight'], positive_only=False)
+
+    users = item_model['users'].append(delta.index.get_level_values(0).unique().difference(item_model['users']))
+    symbols = item_model['symbols'].append(delta.index.get_level_values(1).unique().difference(item_model['symbols']))
+    net = item_model.get('net', item_model['matrix']) * decay
+    net.resize((len(users), len(symbols)))
+    net = (net + to_matrix(delta, users, symbols)[0]).tocsr()
+    matrix = positive_part(net)
+
+    n = len(symbols)
+    k = min(params['k'] * SPARE_FACTOR, max(n - 1, 0))
+    touched = np.unique(symbols.get_indexer(delta.index.get_level_values(1)))
+    updates = item_model.get('updates', 0) + 1
+    if len(touched) > n // 2 or updates >= REBUILD_AFTER:
+        # Most columns changed, or enough approximate updates have piled up: recompute every
+        # neighbor list exactly with the blocked pass a full build uses
+        neighbors, scores = top_k_neighbors(matrix, k)
+        return dict(item_model, symbols=symbols, users=users, matrix=matrix, net=net, neighbors=neighbors, scores=scores,
+                    popular=np.argsort(-np.asarray(matrix.sum(axis=0)).ravel(), kind='stable')[:100], as_of=as_of,
+                    trades_folded=item_model.get('trades_folded', 0) + len(trades_df), updates=0)
+    normalized = normalize_columns(matrix)
+    similarities = column_similarities(normalized, touched)
+
+    # Untouched symbols: old neighbors minus touched ones (their scores are stale), plus every touched symbol
+    old_neighbors = np.zeros((n, k), dtype=np.int32)
+    old_scores = np.full((n, k), -np.inf, dtype=np.float32)
+    old_n, old_k = item_model['neighbors'].shape
+    old_k = min(old_k, k)
+    old_neighbors[:old_n, :old_k] = item_model['neighbors'][:, :old_k]
+    old_scores[:old_n, :old_k] = item_model['scores'][:, :old_k]
+    old_scores[np.isin(old_neighbors, touched)] = -np.inf
+    candidates = np.hstack([old_neighbors, np.broadcast_to(touched, (n, len(touched)))])
+    candidate_scores = np.hstack([old_scores, similarities.T])
+    neighbors, scores = select_top_k(candidates, candidate_scores, k)
+
+    # Touched symbols: rank against everything
+    neighbors[touched], scores[touched] = select_top_k(np.broadcast_to(np.arange(n), similarities.shape), similarities, k)
+    scores[~np.isfinite(scores)] = 0
+
+    return dict(item_model, symbols=symbols, users=users, matrix=matrix, net=net, neighbors=neighbors, scores=scores,
+                popular=np.argsort(-np.asarray(matrix.sum(axis=0)).ravel(), kind='stable')[:100], as_of=as_of,
+                trades_folded=item_model.get('trades_folded', 0) + len(trades_df), updates=updates)
+
+
+def user_weights(item_model, trades_input):
+    """The requesting user's holdings as symbol indexes and weights, plus every symbol they traded.
+
+    Same weighting as interaction_weights, in plain Python since a request holds a handful of trades.
+    """
+    params = item_model['params']
+    days = [parse_day(trade.get('trade_date')) for trade in trades_input]
+    as_of = max((day for day in days if day is not None), default=None)
+
+    totals = {}
+    for trade, day in zip(trades_input, days):
+        try:
+            quantity = max(float(trade.get('quantity') or 1), 0)
+        except (TypeError, ValueError):
+            quantity = 1
+        side = params['sell_weight'] if str(trade.get('trade_type')).lower() == 'sell' else 1.0
+        age_days = (as_of - day).days if day is not None else 0
+        weight = side * math.log1p(quantity) * 0.5 ** (age_days / params['half_life_days'])
+        totals[trade['symbol']] = totals.get(trade['symbol'], 0.0) + weight
+
+    symbols = list(totals)
+    index = item_model['symbols'].get_indexer(symbols)
+    weight = np.array([totals[symbol] for symbol in symbols])
+    held = (index >= 0) & (weight > 0)
+    return index[held], weight[held], index[index >= 0]
+
+
+def recommend_items(item_model, trades_input, top_n=5):
+    """Score neighbors of the user's holdings: O(holdings x k), independent of the number of users"""
+    held, weight, traded = user_weights(item_model, trades_input)
+    k = item_model['params']['k']
+    candidates = item_model['neighbors'][held, :k].ravel()
+    contributions = (item_model['scores'][held, :k] * weight[:, None]).ravel()
+
+    ranked = []
+    if len(candidates):
+        unique, inverse = np.unique(candidates, return_inverse=True)
+        totals = np.bincount(inverse, weights=contributions)
+        keep = ~np.isin(unique, traded) & (totals > 0)
+        unique, totals = unique[keep], totals[keep]
+        ranked = unique[np.argsort(-totals, kind='stable')][:top_n].tolist()
+
+    if len(ranked) < top_n:
+        exclude = set(ranked) | set(traded.tolist())
+        for index in item_model['popular'].tolist():
+            if len(ranked) >= top_n:
+                break
+            if index not in exclude:
+                ranked.append(index)
+    return item_model['symbols'][ranked].tolist()
+
+
+def save_item_model(item_model, filename=DEFAULT_PATH):
+    # Write next to the target and rename, so readers never see a half-written file
+    directory = os.path.dirname(filename) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as file:
+        pickle.dump(item_model, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, filename)
+
+
+def load_item_model(filename=DEFAULT_PATH):
+    with open(filename, 'rb') as file:
+        return pickle.load(file)
+
+
+def current_artifact(directory=ARTIFACT_DIR):
+    """Path of the artifact CURRENT points at, falling back to the bundled model"""
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return DEFAULT_PATH
+
+
+def publish_item_model(item_model, directory=ARTIFACT_DIR, keep=KEEP_VERSIONS):
+    """Save as the next version and atomically repoint CURRENT at it; returns the new path"""
+    os.makedirs(directory, exist_ok=True)
+    versions = sorted(int(name[len('item_model-v'):-len('.pkl')]) for name in os.listdir(directory)
+                      if name.startswith('item_model-v') and name.endswith('.pkl'))
+    version = (versions[-1] if versions else 0) + 1
+    name = f'item_model-v{version}.pkl'
+    item_model = dict(item_model, version=version, published_at=datetime.now().isoformat(timespec='seconds'))
+    save_item_model(item_model, os.path.join(directory, name))
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(name)
+    os.replace(tmp, os.path.join(directory, 'CURRENT'))
+
+    # Old versions stay around briefly for workers still loading them
+    for old in versions[:-keep + 1] if keep > 1 else versions:
+        os.remove(os.path.join(directory, f'item_model-v{old}.pkl'))
+    return os.path.join(directory, name)
+
+
+class ItemModelRegistry:
+    """Serves the current item model and swaps in new published versions without blocking requests.
+
+    get() stats the CURRENT pointer at most every `check_interval` seconds. When it moves, the new
+    artifact is loaded on a background thread while requests keep using the old model, and then
+    the reference is replaced in one assignment. Every worker process runs its own registry.
+    """
+
+    def __init__(self, directory=ARTIFACT_DIR, check_interval=5):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._model = None
+        self._path = None
+        self._checked = 0.0
+        self._loading = False
+        self.swaps = 0
+
+    def _load(self, path):
+        try:
+            model = load_item_model(path)
+            self._model, self._path = model, path
+            self.swaps += 1
+        except Exception as e:
+            logger.error(f"Error loading item model {path}: {str(e)}")
+        finally:
+            self._loading = False
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._load(current_artifact(self.directory))
+                    self._checked = time.monotonic()
+            return self._model
+
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval and not self._loading:
+            self._checked = now
+            path = current_artifact(self.directory)
+            if path != self._path:
+                self._loading = True
+                threading.Thread(target=self._load, args=(path,), daemon=True).start()
+        return self._model
+
+    def info(self):
+        model = self._model
+        if model is None:
+            return {'loaded': False}
+        return {
+            'loaded': True,
+            'path': self._path,
+            'version': model.get('version'),
+            'publishedAt': model.get('published_at'),
+            'asOf': model['as_of'].isoformat(),
+            'symbols': len(model['symbols']),
+            'users': len(model['users']),
+            'tradesFolded': model.get('trades_folded', 0),
+            'updatesSinceRebuild': model.get('updates', 0),
+            'swaps': self.swaps,
+        }
+
+
+registry = ItemModelRegistry()
+
+
+def get_item_model():
+    return registry.get()
+
+
+def get_top_item_choices(trades_input, top_n=5):
+    return recommend_items(get_item_model(), trades_input, top_n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or incrementally update the item-item recommender')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='rebuild from the trades stored in model.pkl')
+    update = commands.add_parser('update', help='fold new trades into the current artifact')
+    update.add_argument('trades_csv', help='CSV with user_id, symbol, trade_date, quantity, trade_type')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        from model.model import get_loaded_model
+        item_model = build_item_model(get_loaded_model()['trades_df'])
+    else:
+        item_model = update_item_model(load_item_model(current_artifact()), pd.read_csv(args.trades_csv))
+    path = publish_item_model(item_model)
+    print(f"Published {path} in {time.perf_counter() - start:.2f}s: {len(item_model['symbols'])} symbols, "
+          f"{len(item_model['users'])} users, as of {item_model['as_of'].date()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
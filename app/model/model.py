@@ -35,36 +35,45 @@ def load_model(filename='./model/model.pkl'):
     with open(filename, 'rb') as file:
         return pickle.load(file)
 
-# Load the stored model
-loaded_model = load_model()
-trades_df = loaded_model['trades_df']
-user_similarity_df = loaded_model['user_similarity']
-
-# Sample user trades
-user_id = 'sample_user_4'
-trades_input = [
-    {'symbol': 'XOM', 'trade_date': '2025-02-01', 'price': 105.30, 'quantity': 10, 'trade_type': 'buy'},
-    {'symbol': 'CVX', 'trade_date': '2025-02-05', 'price': 165.70, 'quantity': 15, 'trade_type': 'buy'},
-    {'symbol': 'COP', 'trade_date': '2025-02-10', 'price': 80.90, 'quantity': 20, 'trade_type': 'buy'},
-    {'symbol': 'OXY', 'trade_date': '2025-02-12', 'price': 60.45, 'quantity': 25, 'trade_type': 'sell'},
-    {'symbol': 'EOG', 'trade_date': '2025-02-18', 'price': 122.60, 'quantity': 12, 'trade_type': 'buy'},
-    {'symbol': 'PXD', 'trade_date': '2025-02-22', 'price': 190.90, 'quantity': 10, 'trade_type': 'buy'},
-    {'symbol': 'SLB', 'trade_date': '2025-02-26', 'price': 48.25, 'quantity': 30, 'trade_type': 'sell'},
-]
-
-# Update trades and similarity matrix with new user data
-trades_df, trade_matrix, user_similarity_df = create_sample_user(user_id, trades_input, trades_df)
-
-# Save updated model
-save_model(user_similarity_df, trade_matrix, trades_df)
-
-# Get stock recommendations
-recommended_stocks = recommend_stocks_for_user(user_id, user_similarity_df, trades_df, top_n=5)
-print(f"Recommended stocks for {user_id}: {recommended_stocks}")
+# The stored model is loaded on first use rather than at import
+loaded_model = None
+
+def get_loaded_model():
+    global loaded_model
+    if loaded_model is None:
+        loaded_model = load_model()
+    return loaded_model
 
 
 def get_top_choices(trades_input, top_n=5):
     user_id = "zample_user_5"
-    trades_df = loaded_model['trades_df']
+    trades_df = get_loaded_model()['trades_df']
     trades_df, trades_matrix, user_similarity_df = create_sample_user(user_id, trades_input, trades_df)
-    return recommend_stocks_for_user(user_id, user_similarity_df, trades_df, top_n)
\ No newline at end of file
+    return recommend_stocks_for_user(user_id, user_similarity_df, trades_df, top_n)
+
+
+if __name__ == '__main__':
+    trades_df = get_loaded_model()['trades_df']
+    user_similarity_df = get_loaded_model()['user_similarity']
+
+    # Sample user trades
+    user_id = 'sample_user_4'
+    trades_input = [
+        {'symbol': 'XOM', 'trade_date': '2025-02-01', 'price': 105.30, 'quantity': 10, 'trade_type': 'buy'},
+        {'symbol': 'CVX', 'trade_date': '2025-02-05', 'price': 165.70, 'quantity': 15, 'trade_type': 'buy'},
+        {'symbol': 'COP', 'trade_date': '2025-02-10', 'price': 80.90, 'quantity': 20, 'trade_type': 'buy'},
+        {'symbol': 'OXY', 'trade_date': '2025-02-12', 'price': 60.45, 'quantity': 25, 'trade_type': 'sell'},
+        {'symbol': 'EOG', 'trade_date': '2025-02-18', 'price': 122.60, 'quantity': 12, 'trade_type': 'buy'},
+        {'symbol': 'PXD', 'trade_date': '2025-02-22', 'price': 190.90, 'quantity': 10, 'trade_type': 'buy'},
+        {'symbol': 'SLB', 'trade_date': '2025-02-26', 'price': 48.25, 'quantity': 30, 'trade_type': 'sell'},
+    ]
+
+    # Update trades and similarity matrix with new user data
+    trades_df, trade_matrix, user_similarity_df = create_sample_user(user_id, trades_input, trades_df)
+
+    # Save updated model
+    save_model(user_similarity_df, trade_matrix, trades_df)
+
+    # Get stock recommendations
+    recommended_stocks = recommend_stocks_for_user(user_id, user_similarity_df, trades_df, top_n=5)
+    print(f"Recommended stocks for {user_id}: {recommended_stocks}")
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+def generate_trades(n_users=1000, n_symbols=500, density=0.02, n_clusters=10, noise=0.2,
+                    sell_ratio=0.15, start_date='2024-01-01', days=365, seed=0):
+    """Synthetic trade history in the same schema as the stored model's trades_df.
+
+    Symbols are split into `n_clusters` themes and every user mostly trades one theme,
+    so collaborative filtering has real structure to find. `density` is the expected
+    fraction of the symbol universe each user trades and `noise` the share of a user's
+    trades picked from outside their theme. Popularity within a theme follows a Zipf curve.
+    """
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f'S{i:05d}' for i in range(n_symbols)])
+    symbol_cluster = rng.integers(0, n_clusters, n_symbols)
+    popularity = 1.0 / np.arange(1, n_symbols + 1) ** 0.8
+    rng.shuffle(popularity)
+
+    cluster_members = [np.flatnonzero(symbol_cluster == c) for c in range(n_clusters)]
+    cluster_weights = [popularity[m] / popularity[m].sum() if len(m) else None for m in cluster_members]
+    global_weights = popularity / popularity.sum()
+
+    user_cluster = rng.integers(0, n_clusters, n_users)
+    trades_per_user = np.maximum(1, rng.poisson(max(density * n_symbols, 1), n_users))
+
+    user_idx = np.repeat(np.arange(n_users), trades_per_user)
+    total = len(user_idx)
+    from_theme = rng.random(total) >= noise
+    symbol_idx = rng.choice(n_symbols, size=total, p=global_weights)
+    for c, members in enumerate(cluster_members):
+        if not len(members):
+            continue
+        mask = from_theme & (user_cluster[user_idx] == c)
+        symbol_idx[mask] = rng.choice(members, size=mask.sum(), p=cluster_weights[c])
+
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days, total), unit='D')
+    base_price = 10 + (np.arange(n_symbols) * 7919) % 490
+    return pd.DataFrame({
+        'user_id': np.char.add('user_', np.arange(n_users).astype(str))[user_idx],
+        'symbol': symbols[symbol_idx],
+        'trade_date': dates.strftime('%Y-%m-%d'),
+        'price': np.round(base_price[symbol_idx] * rng.lognormal(0, 0.1, total), 2),
+        'quantity': rng.integers(1, 100, total),
+        'trade_type': np.where(rng.random(total) < sell_ratio, 'sell', 'buy')
+    })
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from shared_cache import KeyedLocks
+
+
+class NewsCache:
+    """Per-symbol Finnhub company news, fetched incrementally and deduped by article id.
+
+    Only the `max_symbols` most recently requested symbols are kept.
+    """
+
+    def __init__(self, client, window_days=7, refresh_interval=120, max_items=200, max_symbols=500, max_workers=4,
+                 on_fetch=None, background=None):
+        self.client = client
+        self.on_fetch = on_fetch  # called with (symbol, new_items) after each upstream fetch
+        self.background = background  # background(fn) runs fn off the request thread
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval
+        self.max_items = max_items
+        self.max_symbols = max_symbols
+        self.max_workers = max_workers
+        self._items = OrderedDict()  # symbol -> list of articles, newest first; least recently used first
+        self._fetched_at = {}        # symbol -> monotonic time of last upstream call
+        self._locks = KeyedLocks()
+        self._lock = threading.Lock()  # guards the LRU order and _pending
+        self._pending = set()
+
+    def is_fresh(self, symbol):
+        fetched_at = self._fetched_at.get(symbol)
+        return fetched_at is not None and time.monotonic() - fetched_at < self.refresh_interval
+
+    def _cached(self, symbol):
+        with self._lock:
+            if symbol not in self._items:
+                return []
+            self._items.move_to_end(symbol)
+            return self._items[symbol]
+
+    def _store(self, symbol, items):
+        with self._lock:
+            self._items[symbol] = items
+            self._items.move_to_end(symbol)
+            self._fetched_at[symbol] = time.monotonic()
+            while len(self._items) > self.max_symbols:
+                evicted, _ = self._items.popitem(last=False)
+                self._fetched_at.pop(evicted, None)
+
+    def _refresh(self, symbol):
+        with self._locks.hold(symbol):
+            # Another thread may have refreshed while we waited on the lock
+            if self.is_fresh(symbol):
+                return
+            cached = self._items.get(symbol, [])
+            cutoff = datetime.now() - timedelta(days=self.window_days)
+            if cached:
+                # Finnhub filters by day, so re-request from the newest cached day onwards
+                start = max(datetime.fromtimestamp(cached[0]['datetime']), cutoff)
+            else:
+                start = cutoff
+            response = self.client.company_news(
+                symbol,
+                _from=start.strftime('%Y-%m-%d'),
+                to=datetime.now().strftime('%Y-%m-%d')
+            ) or []
+
+            seen = {item['id'] for item in cached}
+            new_items = [item for item in response if item.get('id') not in seen]
+            cutoff_ts = cutoff.timestamp()
+            merged = [item for item in new_items + cached if item.get('datetime', 0) >= cutoff_ts]
+            merged.sort(key=lambda item: item.get('datetime', 0), reverse=True)
+
+            self._store(symbol, merged[:self.max_items])
+
+        if self.on_fetch and new_items:
+            self.on_fetch(symbol, new_items)
+
+    def _refresh_later(self, symbol):
+        with self._lock:
+            if symbol in self._pending:
+                return
+            self._pending.add(symbol)
+
+        def run():
+            try:
+                self._refresh(symbol)
+            finally:
+                with self._lock:
+                    self._pending.discard(symbol)
+
+        self.background(run)
+
+    def get(self, symbol, limit=10):
+        """Cached articles; once stale they are still returned while a background refresh runs, if enabled"""
+        symbol = symbol.upper()
+        if not self.is_fresh(symbol):
+            if self.background is not None and symbol in self._items:
+                self._refresh_later(symbol)
+            else:
+                self._refresh(symbol)
+        return self._cached(symbol)[:limit]
+
+    def get_many(self, symbols, limit=30):
+        """Merge news for several symbols, refreshing only the stale ones concurrently"""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        stale = [s for s in symbols if not self.is_fresh(s)]
+        if self.background is not None:
+            for symbol in stale:
+                if symbol in self._items:
+                    self._refresh_later(symbol)
+            stale = [s for s in stale if s not in self._items]
+        errors = {}
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as pool:
+                futures = {s: pool.submit(self._refresh, s) for s in stale}
+                for symbol, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors[symbol] = str(e)
+
+        # The same article is often tagged with several related symbols
+        merged = {}
+        for symbol in symbols:
+            for item in self._cached(symbol):
+                merged.setdefault(item['id'], item)
+        items = sorted(merged.values(), key=lambda item: item.get('datetime', 0), reverse=True)
+        return items[:limit], errors
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Background thread that keeps caches warm, refreshing often while the market is open.
+
+    `warm(interval)` does the actual fetching; `get_clock()` returns an Alpaca clock. While the
+    market is closed the thread sleeps up to `closed_interval`, waking `pre_open_lead` seconds
+    before the next open so the first requests of the session find warm data.
+    """
+
+    def __init__(self, warm, get_clock, open_interval=30, closed_interval=900, pre_open_lead=120):
+        self.warm = warm
+        self.get_clock = get_clock
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self.pre_open_lead = pre_open_lead
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.market_open = None
+        self.last_run = None
+        self.last_ms = None
+        self.last_error = None
+        self.next_delay = None
+
+    def delay_for(self, clock):
+        """Seconds until the next refresh for the given market clock"""
+        if clock is None:
+            # Clock unavailable; keep refreshing as if open rather than go cold
+            return self.open_interval
+        if clock.is_open:
+            return self.open_interval
+        until_open = (clock.next_open - clock.timestamp).total_seconds() - self.pre_open_lead
+        return max(self.open_interval, min(self.closed_interval, until_open))
+
+    def run_once(self):
+        clock = None
+        try:
+            clock = self.get_clock()
+        except Exception as e:
+            logger.error(f"Error getting market clock for prefetch: {str(e)}")
+        self.market_open = clock.is_open if clock is not None else None
+        delay = self.delay_for(clock)
+
+        start = time.perf_counter()
+        try:
+            self.warm(delay)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error prefetching: {str(e)}")
+        self.last_ms = (time.perf_counter() - start) * 1000
+        self.last_run = time.time()
+        self.runs += 1
+        self.next_delay = delay
+        return delay
+
+    def _loop(self):
+        while not self._stop.is_set():
+            delay = self.run_once()
+            self._stop.wait(delay)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'runs': self.runs,
+            'marketOpen': self.market_open,
+            'lastRun': self.last_run,
+            'lastMs': self.last_ms,
+            'lastError': self.last_error,
+            'nextDelay': self.next_delay
+        }
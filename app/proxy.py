@@ -0,0 +1,25 @@
+class CallProxy:
+    """Proxy that runs the upstream calls of a client through `wrapper(name, fn)`, which calls fn()
+
+    Upstream calls are public method calls and reads of properties defined on the client's type
+    (lazy network fetches such as yfinance's Ticker.info); plain attributes pass straight through.
+    Metrics, rate limits and circuit breakers are all wrappers around the same proxy.
+    """
+
+    def __init__(self, target, wrapper):
+        self._target = target
+        self._wrapper = wrapper
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            return getattr(self._target, name)
+        if isinstance(getattr(type(self._target), name, None), property):
+            return self._wrapper(name, lambda: getattr(self._target, name))
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._wrapper(name, lambda: attr(*args, **kwargs))
+
+        return call
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import threading
+import time
+
+from proxy import CallProxy
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+
+
+def refill(tokens, elapsed, capacity, fill_rate):
+    """Take one token from a bucket last at `tokens`, `elapsed` seconds ago; returns (tokens left, seconds to wait)"""
+    tokens = min(capacity, tokens + max(elapsed, 0) * fill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / fill_rate
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per `per` seconds, shared across threads.
+
+    Only `burst` calls (default: one second's worth) can go out back to back, so no window of
+    `per` seconds ever sees more than rate + burst calls.
+    """
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.fill_rate = rate / per
+        self.capacity = float(burst or max(1, round(self.fill_rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens, wait = refill(self._tokens, now - self._updated, self.capacity, self.fill_rate)
+                self._updated = now
+                if not wait:
+                    return
+            time.sleep(wait)
+
+
+class SharedRateLimiter(RateLimiter):
+    """The same token bucket kept in a SQLite file, so every process on the host draws from one budget"""
+
+    def __init__(self, path, key, rate, per=60.0, burst=None):
+        super().__init__(rate, per, burst)
+        self.path = path
+        self.key = key
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    @property
+    def _conn(self):
+        # Reconnect after a fork; the parent's handle is unusable in the child
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def acquire(self):
+        while True:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE key = ?', (self.key,)).fetchone()
+                tokens, updated = row if row is not None else (self.capacity, now)
+                tokens, wait = refill(tokens, now - updated, self.capacity, self.fill_rate)
+                conn.execute('INSERT OR REPLACE INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?)',
+                             (self.key, tokens, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def rate_limited(target, limiter):
+    """Proxy that takes a token from `limiter` before every upstream call on a client"""
+    def acquire_first(name, fn):
+        limiter.acquire()
+        return fn()
+
+    return CallProxy(target, acquire_first)
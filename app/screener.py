@@ -0,0 +1,256 @@
+"""Screen hundreds of symbols at once on trend, volatility, volume and 52-week range.
+
+Metrics come from date x symbol matrices of stored daily bars, so every symbol is scored with the
+same column operations; only the batched download that fills the bar store touches the network.
+
+    python screener.py --trend strongly_bullish --days 21 --refresh
+"""
+import argparse
+import re
+import sys
+import threading
+import warnings
+from datetime import date, timedelta
+
+from indicators import compute as compute_indicators
+
+SYMBOL_PATTERN = r'^[A-Z0-9][A-Z0-9.-]{0,9}$'
+TRADING_DAYS = 252
+HISTORY_DAYS = 400  # calendar days of bars to keep: a year of trading days plus the return window
+UNIVERSE_SIZE = 500
+
+# Same thresholds as the chatbot's analyze_trend
+TRENDS = ('strongly_bullish', 'mildly_bullish', 'mildly_bearish', 'strongly_bearish')
+
+# Query parameter -> (metric, comparison)
+FILTERS = {
+    'min_return': ('return', 'min'),
+    'max_return': ('return', 'max'),
+    'min_volatility': ('volatility', 'min'),
+    'max_volatility': ('volatility', 'max'),
+    'min_volume': ('avgVolume', 'min'),
+    'min_rel_volume': ('relVolume', 'min'),
+    'min_range_position': ('rangePosition', 'min'),
+    'max_range_position': ('rangePosition', 'max'),
+    'min_rsi': ('rsi14', 'min'),
+    'max_rsi': ('rsi14', 'max'),
+    # Within this fraction of the 52-week high / low
+    'near_high': ('fromHigh', 'within'),
+    'near_low': ('fromLow', 'within'),
+}
+METRIC_COLUMNS = ('symbol', 'close', 'return', 'trend', 'volatility', 'avgVolume', 'relVolume', 'high52', 'low52',
+                  'rangePosition', 'fromHigh', 'fromLow', 'sma50', 'aboveSma50', 'rsi14', 'macdHist')
+SORT_KEYS = ('return', 'volatility', 'avgVolume', 'relVolume', 'rangePosition', 'fromHigh', 'fromLow', 'rsi14')
+
+
+def default_universe(listing_path='universe.csv', trades='all_transactions.csv', limit=UNIVERSE_SIZE):
+    """Symbols from a one-column listing (e.g. the S&P 500) if present, else the most traded congress tickers.
+
+    `trades` is the congress CSV path or an already loaded frame of it.
+    """
+    import os
+    import pandas as pd
+
+    if os.path.exists(listing_path):
+        listing = pd.read_csv(listing_path)
+        column = next((c for c in listing.columns if c.lower() in ('symbol', 'ticker')), listing.columns[0])
+        symbols = listing[column].astype(str).str.strip().str.upper()
+    else:
+        if isinstance(trades, str):
+            trades = pd.read_csv(trades, usecols=['ticker'])
+        tickers = trades['ticker'].astype(str).str.strip().str.upper()
+        symbols = tickers.value_counts().index.to_series()
+    symbols = symbols[symbols.str.match(SYMBOL_PATTERN)]
+    return list(dict.fromkeys(symbols))[:limit]
+
+
+def trend_label(change):
+    import numpy as np
+
+    return np.select([change > 0.05, change > 0, change > -0.05, np.isfinite(change)], TRENDS, default=None)
+
+
+def screen_metrics(bars, days=21):
+    """One row of metrics per symbol from a long frame of symbol, date, high, low, close and volume"""
+    import numpy as np
+    import pandas as pd
+
+    if bars.empty:
+        # Nothing stored yet (fresh install, or the refresh failed): an empty screen, not an error
+        metrics = pd.DataFrame(columns=list(METRIC_COLUMNS))
+        metrics.attrs['asOf'] = None
+        return metrics
+
+    wide = bars.pivot(index='date', columns='symbol').sort_index()
+    # Carry a close over a few missing days (halts, late prints) but not a delisting
+    close = wide['close'].ffill(limit=5)
+    symbols = close.columns
+    c = close.to_numpy(dtype=float)
+    year = slice(-TRADING_DAYS, None)
+    high = wide['high'].reindex(columns=symbols).to_numpy(dtype=float)[year]
+    low = wide['low'].reindex(columns=symbols).to_numpy(dtype=float)[year]
+    volume = wide['volume'].reindex(columns=symbols).to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # all-NaN columns
+        last = c[-1]
+        change = last / c[-1 - days] - 1 if len(c) > days else np.full(len(symbols), np.nan)
+        window = max(days, 20)
+        log_returns = np.diff(np.log(c[-window - 1:]), axis=0)
+        volatility = np.nanstd(log_returns, axis=0) * np.sqrt(TRADING_DAYS)
+        avg_volume = np.nanmean(volume[-20:], axis=0)
+        high52, low52 = np.nanmax(high, axis=0), np.nanmin(low, axis=0)
+        indicators = compute_indicators(c)
+
+        metrics = pd.DataFrame({
+            'symbol': symbols,
+            'close': last,
+            'return': change,
+            'trend': trend_label(change),
+            'volatility': volatility,
+            'avgVolume': avg_volume,
+            'relVolume': volume[-1] / avg_volume,
+            'high52': high52,
+            'low52': low52,
+            'rangePosition': (last - low52) / (high52 - low52),
+            'fromHigh': last / high52 - 1,
+            'fromLow': last / low52 - 1,
+            'sma50': indicators['sma50'][-1],
+            'aboveSma50': last > indicators['sma50'][-1],
+            'rsi14': indicators['rsi14'][-1],
+            'macdHist': indicators['macdHist'][-1],
+        })
+    metrics = metrics[np.isfinite(metrics['close'])].reset_index(drop=True)
+    metrics.attrs['asOf'] = str(close.index[-1])[:10] if len(close) else None
+    return metrics
+
+
+def apply_filters(metrics, trend=None, above_sma50=None, **filters):
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise ValueError(f'Unknown filters: {", ".join(sorted(unknown))}; expected {", ".join(FILTERS)}')
+    mask = metrics['close'].notna()
+    if trend:
+        trends = [t.strip().lower().replace(' ', '_') for t in (trend.split(',') if isinstance(trend, str) else trend)]
+        bad = set(trends) - set(TRENDS)
+        if bad:
+            raise ValueError(f'trend must be one of {", ".join(TRENDS)}')
+        mask &= metrics['trend'].isin(trends)
+    if above_sma50 is not None:
+        mask &= metrics['aboveSma50'] == bool(above_sma50)
+    for name, value in filters.items():
+        column, comparison = FILTERS[name]
+        value = float(value)
+        if comparison == 'min':
+            mask &= metrics[column] >= value
+        elif comparison == 'max':
+            mask &= metrics[column] <= value
+        else:
+            mask &= metrics[column].abs() <= value
+    return metrics[mask]
+
+
+class Screener:
+    """Screens stored bars, recomputing the metric table only when the universe, window or bars change"""
+
+    def __init__(self, bar_store):
+        self.bar_store = bar_store
+        self._lock = threading.Lock()
+        self._key = None
+        self._metrics = None
+
+    def metrics(self, symbols, days=21):
+        key = (tuple(symbols), days, self.bar_store.version)
+        with self._lock:
+            if key != self._key:
+                start = date.today() - timedelta(days=HISTORY_DAYS)
+                bars = self.bar_store.load(symbols, start=start, fields=('high', 'low', 'close', 'volume'))
+                self._metrics = screen_metrics(bars, days)
+                self._key = key
+            return self._metrics
+
+    def refresh(self, symbols):
+        """Batched download of whatever recent bars the universe is missing"""
+        return self.bar_store.refresh(symbols, start=date.today() - timedelta(days=HISTORY_DAYS))
+
+    def run(self, symbols, days=21, sort='return', ascending=False, limit=25, **filters):
+        if sort not in SORT_KEYS:
+            raise ValueError(f'sort must be one of {", ".join(SORT_KEYS)}')
+        if not 1 <= days < TRADING_DAYS:
+            raise ValueError(f'days must be between 1 and {TRADING_DAYS - 1}')
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        metrics = self.metrics(symbols, days)
+        matches = apply_filters(metrics, **filters)
+        ranked = matches.sort_values(sort, ascending=ascending, na_position='last', kind='stable').head(limit)
+        return {
+            'asOf': metrics.attrs.get('asOf'),
+            'days': days,
+            'universe': len(symbols),
+            'screened': len(metrics),
+            'matches': len(matches),
+            'results': ranked.astype(object).where(ranked.notna(), None).to_dict('records'),
+        }
+
+
+def parse_screen_query(query):
+    """Filters, return window and sort order implied by a chat question like "strongly bullish stocks this month" """
+    text = query.lower()
+    filters = {}
+    trend = re.search(r'(strongly|mildly)?\s*(bullish|bearish)', text)
+    if trend:
+        side = trend.group(2)
+        filters['trend'] = [f'{trend.group(1)}_{side}'] if trend.group(1) else [f'strongly_{side}', f'mildly_{side}']
+    if re.search(r'52[- ]?week high|new highs?|near (their |the )?highs?', text):
+        filters['near_high'] = 0.05
+    if re.search(r'52[- ]?week low|new lows?|near (their |the )?lows?', text):
+        filters['near_low'] = 0.05
+    if re.search(r'low[- ]volatility|stable|calm', text):
+        filters['max_volatility'] = 0.25
+    if re.search(r'high[- ]volatility|volatile', text):
+        filters['min_volatility'] = 0.4
+    if re.search(r'unusual volume|high volume|volume spike', text):
+        filters['min_rel_volume'] = 2.0
+    if re.search(r'oversold', text):
+        filters['max_rsi'] = 30
+    if re.search(r'overbought', text):
+        filters['min_rsi'] = 70
+
+    days = 21
+    if 'week' in text and '52' not in text:
+        days = 5
+    elif re.search(r'quarter|3 months', text):
+        days = 63
+    elif re.search(r'6 months|half', text):
+        days = 126
+    bearish = 'bearish' in text or 'near_low' in filters
+    return filters, days, 'return', bearish
+
+
+def main(argv=None):
+    from bar_store import BarStore
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', help='comma-separated; default: universe.csv or the most traded congress tickers')
+    parser.add_argument('--bars', default='bars.db')
+    parser.add_argument('--refresh', action='store_true', help='download missing bars first')
+    parser.add_argument('--days', type=int, default=21)
+    parser.add_argument('--trend')
+    parser.add_argument('--sort', default='return')
+    parser.add_argument('--limit', type=int, default=25)
+    args = parser.parse_args(argv)
+
+    screener = Screener(BarStore(args.bars))
+    symbols = args.symbols.split(',') if args.symbols else default_universe()
+    if args.refresh:
+        screener.refresh(symbols)
+    result = screener.run(symbols, args.days, args.sort, limit=args.limit, trend=args.trend)
+    print(f"{result['matches']} of {result['screened']} symbols match, as of {result['asOf']}")
+    for row in result['results']:
+        print(f"{row['symbol']:<8} {row['return']:+8.2%}  {row['trend'] or '':<17} vol {row['volatility'] or 0:.0%}  "
+              f"52w position {row['rangePosition'] or 0:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    symbol TEXT,
+    title TEXT,
+    body TEXT,
+    url TEXT,
+    published INTEGER
+);
+CREATE INDEX IF NOT EXISTS docs_symbol ON docs (symbol, published);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    symbol, title, body, content='docs', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+    INSERT INTO docs_fts (rowid, symbol, title, body) VALUES (new.rowid, new.symbol, new.title, new.body);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def to_fts_query(text):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class SearchIndex:
+    """Local full-text index over Finnhub news and congressional transactions"""
+
+    def __init__(self, path='search_index.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, rows):
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                'INSERT OR IGNORE INTO docs (doc_id, kind, symbol, title, body, url, published) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            return cursor.rowcount
+
+    def add_news(self, symbol, items):
+        """Index Finnhub company_news articles; already indexed ids are skipped"""
+        rows = [(
+            f"news:{item['id']}",
+            'news',
+            symbol.upper(),
+            item.get('headline', ''),
+            item.get('summary', ''),
+            item.get('url', ''),
+            int(item.get('datetime') or 0)
+        ) for item in items if item.get('id') is not None]
+        return self._insert(rows)
+
+    def add_congress_trades(self, trades_df):
+        import pandas as pd
+
+        df = trades_df.fillna('')
+        published = pd.to_datetime(df['transaction_date'], errors='coerce').fillna(pd.Timestamp(0))
+        published = published.values.astype('datetime64[s]').astype('int64')
+        rows = []
+        for record, ts in zip(df.to_dict('records'), published):
+            # Rows have no natural key, so identify them by content
+            digest = hashlib.sha1('|'.join(str(v) for v in record.values()).encode()).hexdigest()
+            rows.append((
+                f'congress:{digest}',
+                'congress',
+                str(record.get('ticker', '')).upper(),
+                f"{record.get('representative', '')} {record.get('type', '')} {record.get('ticker', '')}",
+                ' '.join(str(record.get(col, '')) for col in (
+                    'asset_description', 'amount', 'owner', 'party', 'state', 'district', 'industry', 'sector'
+                )),
+                record.get('ptr_link', ''),
+                int(ts)
+            ))
+        return self._insert(rows)
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def sync_congress_csv(self, csv_path='all_transactions.csv'):
+        """Index rows appended to the congress CSV since the last sync"""
+        stat = os.stat(csv_path)
+        signature = f'{stat.st_size}:{stat.st_mtime_ns}'
+        if self._get_meta('congress_signature') == signature:
+            return 0
+        import pandas as pd
+
+        done = int(self._get_meta('congress_rows') or 0)
+        trades_df = pd.read_csv(csv_path)
+        if len(trades_df) < done:
+            # File was rewritten rather than appended to; content hashes keep this idempotent
+            done = 0
+        added = self.add_congress_trades(trades_df.iloc[done:])
+        self._set_meta('congress_rows', len(trades_df))
+        self._set_meta('congress_signature', signature)
+        return added
+
+    def search(self, query, symbol=None, kind=None, limit=20):
+        fts_query = to_fts_query(query) if query else None
+        if fts_query is None and not symbol:
+            return []
+
+        params = []
+        if fts_query:
+            sql = (
+                "SELECT d.doc_id, d.kind, d.symbol, d.title, "
+                "snippet(docs_fts, 2, '[', ']', '...', 12), d.url, d.published "
+                "FROM docs_fts JOIN docs d ON d.rowid = docs_fts.rowid "
+                "WHERE docs_fts MATCH ?"
+            )
+            params.append(fts_query)
+        else:
+            sql = (
+                "SELECT d.doc_id, d.kind, d.symbol, d.title, substr(d.body, 1, 200), d.url, d.published "
+                "FROM docs d WHERE 1 = 1"
+            )
+        if symbol:
+            sql += ' AND d.symbol = ?'
+            params.append(symbol.upper())
+        if kind:
+            sql += ' AND d.kind = ?'
+            params.append(kind)
+        sql += ' ORDER BY bm25(docs_fts), d.published DESC' if fts_query else ' ORDER BY d.published DESC'
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{
+            'id': doc_id,
+            'kind': doc_kind,
+            'symbol': doc_symbol,
+            'title': title,
+            'snippet': snippet,
+            'url': url,
+            'published': published
+        } for doc_id, doc_kind, doc_symbol, title, snippet, url, published in rows]
@@ -0,0 +1,188 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires REAL NOT NULL);
+"""
+
+MISSING = object()
+
+# What set_fresh stores, so get_or_refresh can tell its entries from values stored with set()
+Fresh = namedtuple('Fresh', ['fresh_until', 'value'])
+
+
+class KeyedLocks:
+    """A lock per key that exists only while someone holds or waits on it.
+
+    Keys come from request paths (symbols), so locks are dropped once the last user releases
+    them instead of accumulating one per symbol ever requested.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}  # key -> [lock, users]
+
+    @contextmanager
+    def hold(self, key):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+class SharedCache:
+    """Pickled key/value cache in a local SQLite file, shared by every worker process on the host.
+
+    Each process and thread gets its own connection (SQLite handles must not cross a fork).
+    get_or_set() takes a short lease on a missing key so that only one process on the host
+    calls the upstream while the others wait for its result. get_or_refresh() keeps serving a
+    value past its ttl while one of them fetches a replacement in the background.
+    """
+
+    def __init__(self, path='shared_cache.db', lease_seconds=10):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._key_locks = KeyedLocks()
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def _conn(self):
+        # Reconnect after a fork; the parent's handle is unusable in the child
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def get(self, key, default=None):
+        row = self._conn.execute(
+            'SELECT value FROM cache WHERE key = ? AND expires > ?', (key, time.time())
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, blob, time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.purge_expired()
+
+    def delete(self, key):
+        self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def purge_expired(self):
+        now = time.time()
+        self._conn.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        self._conn.execute('DELETE FROM leases WHERE expires <= ?', (now,))
+
+    def _acquire_lease(self, key, seconds=None):
+        """The lease's expiry time if we got it (our token for releasing it), else None"""
+        now = time.time()
+        expires = now + (seconds or self.lease_seconds)
+        conn = self._conn
+        conn.execute('DELETE FROM leases WHERE key = ? AND expires <= ?', (key, now))
+        cursor = conn.execute('INSERT OR IGNORE INTO leases (key, expires) VALUES (?, ?)', (key, expires))
+        return expires if cursor.rowcount == 1 else None
+
+    def _release_lease(self, key, token):
+        # Only our own lease: if it ran out, another process may hold the key by now
+        self._conn.execute('DELETE FROM leases WHERE key = ? AND expires = ?', (key, token))
+
+    def get_or_set(self, key, fn, ttl, lease_seconds=None):
+        """Cached value, or fn() stored for ttl seconds. Other processes wait up to `lease_seconds`
+        (default: the cache's) for the one fetching it, so pass the longest fn() can take.
+        """
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        # One fetch per key per process...
+        with self._key_locks.hold(key):
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+
+            # ...and per host: if another worker holds the lease, wait for its result
+            token = self._acquire_lease(key, lease_seconds)
+            if token is None:
+                deadline = time.monotonic() + (lease_seconds or self.lease_seconds)
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = self.get(key, MISSING)
+                    if value is not MISSING:
+                        return value
+                # The other worker failed or stalled; fetch it ourselves
+                token = self._acquire_lease(key, lease_seconds)
+            try:
+                value = fn()
+                self.set(key, value, ttl)
+            finally:
+                if token is not None:
+                    self._release_lease(key, token)
+            return value
+
+    def set_fresh(self, key, value, ttl, stale_ttl):
+        """Store a value for get_or_refresh: fresh for `ttl` seconds, then servable for `stale_ttl` more"""
+        self.set(key, Fresh(time.time() + ttl, value), ttl + stale_ttl)
+
+    def get_or_refresh(self, key, fn, ttl, stale_ttl, background):
+        """Like get_or_set, but an entry past its ttl is returned at once while background(refresh)
+        replaces it, one refresh per host at a time. Returns (value, stale).
+        """
+        entry = self.get(key, MISSING)
+        if entry is not MISSING:
+            if isinstance(entry, Fresh):
+                fresh_until, value = entry
+            else:
+                fresh_until, value = 0.0, entry  # stored by plain set(); serve it once and replace it
+            stale = time.time() > fresh_until
+            token = self._acquire_lease(key) if stale else None
+            if token is not None:
+                background(self._refresh, key, fn, ttl, stale_ttl, token)
+            return value, stale
+        _, value = self.get_or_set(key, lambda: Fresh(time.time() + ttl, fn()), ttl + stale_ttl)
+        return value, False
+
+    def _refresh(self, key, fn, ttl, stale_ttl, token):
+        try:
+            self.set_fresh(key, fn(), ttl, stale_ttl)
+        finally:
+            self._release_lease(key, token)
+
+    def stats(self):
+        entries = self._conn.execute('SELECT COUNT(*) FROM cache WHERE expires > ?', (time.time(),)).fetchone()[0]
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
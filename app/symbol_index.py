@@ -0,0 +1,92 @@
+import re
+import threading
+from bisect import bisect_left
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.-]{0,9}$')
+WORD_SPLIT = re.compile(r'[^a-z0-9]+')
+
+# Prefixes this short match too many keys to rank per request, so their results are precomputed
+SHORT_PREFIX = 2
+MAX_RESULTS = 50
+
+# Match tiers, best first
+EXACT, SYMBOL_PREFIX, NAME_PREFIX = 0, 1, 2
+
+
+class SymbolIndex:
+    """In-memory prefix index over ticker symbols and company names for autocomplete.
+
+    Symbols are added with add() and become searchable after build(). Keys (the lowercased
+    symbol, each word of the name and the whole name) live in one sorted list, so a query is a
+    bisect plus a scan of the matching range; one- and two-character prefixes are answered
+    from a precomputed table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+        self._keys = []
+        self._entries = []
+        self._short = {}
+
+    def add(self, symbol, name=None, weight=0, source=None):
+        """Register a symbol; later names only fill in a missing one and weights accumulate"""
+        symbol = str(symbol).strip().upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            return False
+        with self._lock:
+            record = self._records.setdefault(symbol, {'symbol': symbol, 'name': None, 'weight': 0, 'sources': []})
+            if isinstance(name, str) and name.strip() and not record['name']:
+                record['name'] = str(name).strip()
+            record['weight'] += weight
+            if source and source not in record['sources']:
+                record['sources'].append(source)
+        return True
+
+    def build(self):
+        with self._lock:
+            entries = []
+            for symbol, record in self._records.items():
+                entries.append((symbol.lower(), SYMBOL_PREFIX, symbol))
+                name = (record['name'] or '').lower()
+                if name:
+                    entries.append((name, NAME_PREFIX, symbol))
+                    entries += [(word, NAME_PREFIX, symbol) for word in set(WORD_SPLIT.split(name)) if word]
+            entries.sort()
+            self._entries = entries
+            self._keys = [entry[0] for entry in entries]
+            self._short = {}
+            for prefix in {key[:n] for key in self._keys for n in range(1, SHORT_PREFIX + 1)}:
+                self._short[prefix] = self._rank(prefix, MAX_RESULTS)
+
+    def _rank(self, prefix, limit):
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + '\uffff')
+        best = {}
+        for key, tier, symbol in self._entries[lo:hi]:
+            if tier == SYMBOL_PREFIX and key == prefix:
+                tier = EXACT
+            if tier < best.get(symbol, NAME_PREFIX + 1):
+                best[symbol] = tier
+        records = self._records
+        return sorted(best, key=lambda s: (best[s], -records[s]['weight'], s))[:limit]
+
+    def search(self, query, limit=10):
+        prefix = ' '.join(str(query).lower().split())
+        if not prefix:
+            return []
+        limit = max(1, min(limit, MAX_RESULTS))
+        if len(prefix) <= SHORT_PREFIX:
+            symbols = self._short.get(prefix, [])[:limit]
+        else:
+            symbols = self._rank(prefix, limit)
+        return [{'symbol': s, 'name': self._records[s]['name']} for s in symbols]
+
+    def __contains__(self, symbol):
+        return str(symbol).upper() in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def stats(self):
+        return {'symbols': len(self._records), 'keys': len(self._keys), 'shortPrefixes': len(self._short)}
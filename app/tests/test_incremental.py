@@ -0,0 +1,106 @@
+"""Incremental paths agree with doing the whole thing over: indicator state and the order export cursor"""
+import csv
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fetch_alpaca_orders import export_orders
+from indicators import IndicatorState, compute
+
+
+def random_closes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def last_values(closes):
+    return {name: float(values[-1]) for name, values in compute(closes).items()}
+
+
+def test_indicator_state_matches_full_recompute():
+    closes = random_closes(300)
+    state = IndicatorState.from_closes(closes[:120])
+    for close in closes[120:]:
+        values = state.update(close)
+
+    expected = last_values(closes)
+    for name, value in expected.items():
+        assert values[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_indicator_state_from_closes_matches_full_recompute():
+    closes = random_closes(80, seed=1)
+    values = IndicatorState.from_closes(closes).values()
+
+    for name, value in last_values(closes).items():
+        assert values[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_indicator_state_peek_does_not_commit():
+    closes = random_closes(100, seed=2)
+    state = IndicatorState.from_closes(closes[:-1])
+    before = state.values()
+
+    assert state.peek(closes[-1]) == pytest.approx(IndicatorState.from_closes(closes).values())
+    assert state.values() == before
+
+
+class FakeOrders:
+    """Alpaca's list_orders over an in-memory history, optionally failing after some calls"""
+
+    def __init__(self, orders, fail_after=None):
+        self.orders = orders
+        self.fail_after = fail_after
+        self.calls = []
+
+    def list_orders(self, status='all', limit=50, after=None, direction='asc', nested=False):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise ConnectionError('upstream went away')
+        self.calls.append(after)
+        since = pd.Timestamp(after) if after is not None else None
+        matching = [o for o in self.orders if since is None or pd.Timestamp(o.submitted_at) > since]
+        return sorted(matching, key=lambda o: o.submitted_at)[:limit]
+
+
+def make_orders(count, start='2024-01-02T15:00:00Z', per_second=3):
+    # Several orders share each timestamp, so pages end partway through a second
+    start = pd.Timestamp(start)
+    return [SimpleNamespace(id=f'order-{i:04d}', symbol='AAPL', side='buy', type='market', status='filled',
+                            qty='1', submitted_at=(start + pd.Timedelta(seconds=i // per_second)).isoformat())
+            for i in range(count)]
+
+
+def exported_ids(path):
+    with open(path, newline='') as f:
+        return [row['id'] for row in csv.DictReader(f)]
+
+
+def test_export_resumes_from_cursor(tmp_path):
+    output = str(tmp_path / 'orders.csv')
+    orders = make_orders(11)
+    api = FakeOrders(orders)
+
+    assert export_orders(api, output, page_size=4) == 11
+    assert exported_ids(output) == [o.id for o in orders]
+
+    # A later run fetches only orders submitted since the cursor
+    orders += make_orders(5, start='2024-01-03T15:00:00Z')
+    api = FakeOrders(orders)
+    assert export_orders(api, output, page_size=4) == 5
+    assert api.calls[0] is not None
+    assert exported_ids(output) == [o.id for o in orders]
+
+
+def test_export_resumes_after_failure(tmp_path):
+    output = str(tmp_path / 'orders.csv')
+    orders = make_orders(13)
+
+    with pytest.raises(ConnectionError):
+        export_orders(FakeOrders(orders, fail_after=2), output, page_size=4)
+    partial = exported_ids(output)
+    assert 0 < len(partial) < len(orders)
+
+    assert export_orders(FakeOrders(orders), output, page_size=4) == len(orders) - len(partial)
+    assert exported_ids(output) == [o.id for o in orders]
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import deque
+
+
+class StageTimer:
+    """Records how long each named stage of a request took, in milliseconds"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.stages = {}
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = (now - self._last) * 1000
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return (self._last - self.start) * 1000
+
+    def server_timing(self):
+        """Format stages as a Server-Timing header value"""
+        parts = [f'{stage};dur={ms:.2f}' for stage, ms in self.stages.items()]
+        parts.append(f'total;dur={self.total_ms:.2f}')
+        return ', '.join(parts)
+
+
+class LatencyTracker:
+    """Keeps the most recent per-stage timings and summarizes them as percentiles"""
+
+    def __init__(self, maxlen=1000):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, timer):
+        with self._lock:
+            self._samples.append(dict(timer.stages, total=timer.total_ms))
+
+    def summary(self):
+        import numpy as np
+
+        with self._lock:
+            samples = list(self._samples)
+        stages = {}
+        for stage in dict.fromkeys(k for sample in samples for k in sample):
+            values = np.array([sample[stage] for sample in samples if stage in sample])
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[stage] = {
+                'count': int(len(values)),
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': float(values.max())
+            }
+        return {'samples': len(samples), 'stages': stages}